@@ -0,0 +1,37 @@
+"""
+Konuşma erişim kontrolü.
+
+Katılımcı listesi belleğe yüklenmez; üyelik ara tabloda tek bir EXISTS ile
+sorulur ve konuşma/mesaj okumasına annotate edilir, böylece kayıt ve
+yetki kontrolü aynı sorguda gelir.
+"""
+from django.db.models import Exists, OuterRef
+from django.shortcuts import get_object_or_404
+from .models import Conversation, Message
+
+
+def membership(user_id, conversation_ref='pk'):
+    """Kullanıcının OuterRef(conversation_ref) konuşmasına katılımcı olup olmadığı"""
+    return Exists(
+        Conversation.participants.through.objects.filter(
+            conversation_id=OuterRef(conversation_ref), customuser_id=user_id
+        )
+    )
+
+
+def is_participant(conversation_id, user_id):
+    return Conversation.participants.through.objects.filter(
+        conversation_id=conversation_id, customuser_id=user_id
+    ).exists()
+
+
+def get_conversation_for_user(conversation_id, user):
+    """Konuşmayı is_participant ile birlikte okur; yoksa 404"""
+    return get_object_or_404(
+        Conversation.objects.annotate(is_participant=membership(user.id)), pk=conversation_id
+    )
+
+
+def get_message_for_user(message_id, user):
+    """Mesajı is_participant ile birlikte okur; yoksa Message.DoesNotExist"""
+    return Message.objects.annotate(is_participant=membership(user.id, 'conversation_id')).get(pk=message_id)
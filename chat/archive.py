@@ -0,0 +1,55 @@
+"""
+Sohbet mesajlarının arşiv katmanı.
+
+AFTER_DAYS günden eski ve okunmuş mesajlar Message tablosundan ArchivedMessage
+tablosuna id'leri korunarak taşınır. Böylece okundu işaretleme ve gönderim
+sorguları yalnızca küçük kalan sıcak tabloda çalışır. Okunmamış mesajlar ve
+gelen kutusunda son mesaj olarak görünen mesajlar sıcak tabloda kalır.
+Mesaj geçmişi MessageSeekPagination ile iki katmandan birlikte okunur.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Message, ArchivedMessage, InboxEntry
+
+DEFAULTS = {
+    'AFTER_DAYS': 90,
+    'BATCH_SIZE': 1000,
+}
+ARCHIVED_FIELDS = [
+    'id', 'conversation_id', 'sender_id', 'text', 'media', 'blob_id',
+    'is_read', 'status', 'created_at', 'updated_at',
+]
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CHAT_ARCHIVE', {})}
+
+
+def archivable_messages(before):
+    return Message.objects.filter(created_at__lt=before, is_read=True).exclude(
+        id__in=InboxEntry.objects.filter(last_message__isnull=False).values('last_message_id')
+    )
+
+
+def archive_messages(before=None, batch_size=None):
+    """before'dan eski mesajları parti parti arşive taşır, taşınan mesaj sayısını döndürür"""
+    config = get_config()
+    if before is None:
+        before = timezone.now() - timedelta(days=config['AFTER_DAYS'])
+    batch_size = batch_size or config['BATCH_SIZE']
+
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(archivable_messages(before).order_by('id').values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                break
+            # Yarıda kalmış bir çalıştırma tekrarlanırsa zaten arşivlenen satırlar atlanır
+            ArchivedMessage.objects.bulk_create([ArchivedMessage(**row) for row in rows], ignore_conflicts=True)
+            Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
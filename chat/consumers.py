@@ -0,0 +1,62 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from users.permissions import is_ban_active
+from .realtime import user_group, participant_ids, EVENT_HANDLER
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Kullanıcı başına tek WebSocket bağlantısı.
+
+    Sunucu yeni mesajları (message.new), durum değişikliklerini
+    (message.status) ve yazıyor bilgisini (typing) iletir. İstemciden yalnızca
+    {"type": "typing", "conversation_id": ..., "is_typing": true} kabul edilir;
+    mesaj gönderme ve okundu bilgisi REST uç noktalarında kalır.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        # REST tarafındaki IsNotBanned ile aynı kural: süresi dolan ban engellemez
+        if user is None or not user.is_authenticated or is_ban_active(user):
+            await self.close(code=4401)
+            return
+        self.user = user
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'typing':
+            await self.handle_typing(content)
+        else:
+            await self.send_json({'type': 'error', 'message': 'Bilinmeyen olay tipi.'})
+
+    async def handle_typing(self, content):
+        try:
+            conversation_id = int(content.get('conversation_id'))
+        except (TypeError, ValueError):
+            await self.send_json({'type': 'error', 'message': 'conversation_id gerekli.'})
+            return
+        user_ids = await database_sync_to_async(participant_ids)(conversation_id)
+        if self.user.id not in user_ids:
+            await self.send_json({'type': 'error', 'message': 'Bu konuşmaya erişiminiz yok.'})
+            return
+        message = {
+            'type': EVENT_HANDLER,
+            'event': 'typing',
+            'payload': {
+                'conversation_id': conversation_id,
+                'user_id': self.user.id,
+                'is_typing': bool(content.get('is_typing', True)),
+            },
+        }
+        for user_id in user_ids:
+            if user_id != self.user.id:
+                await self.channel_layer.group_send(user_group(user_id), message)
+
+    async def chat_event(self, event):
+        await self.send_json({'type': event['event'], **event['payload']})
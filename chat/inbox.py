@@ -0,0 +1,103 @@
+"""
+Gelen kutusu özet tablosunun (InboxEntry) bakımı.
+
+Her (kullanıcı, konuşma) için son mesaj, kısa metin, son etkinlik zamanı ve
+okunmamış sayısı tutulur. Mesaj oluşturulduğunda ve okundu işaretlendiğinde
+satırlar tek UPDATE ile güncellenir; rebuild_inbox tabloyu mesajlardan
+yeniden kurar.
+"""
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
+from .models import Conversation, Message, InboxEntry
+
+SNIPPET_LENGTH = 100
+MEDIA_SNIPPET = '[Medya]'
+
+
+def make_snippet(message):
+    if message.text:
+        return message.text[:SNIPPET_LENGTH]
+    return MEDIA_SNIPPET if message.media else ''
+
+
+def ensure_entries(conversation, user_ids):
+    """Konuşmanın katılımcıları için eksik gelen kutusu satırlarını oluşturur"""
+    InboxEntry.objects.bulk_create(
+        [
+            InboxEntry(user_id=user_id, conversation=conversation, last_activity_at=conversation.created_at)
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_message(message):
+    """Yeni mesajı katılımcıların satırlarına yazar; gönderen dışındakilerin okunmamış sayısını artırır"""
+    updated = InboxEntry.objects.filter(conversation_id=message.conversation_id).update(
+        last_message=message,
+        snippet=make_snippet(message),
+        last_activity_at=message.created_at,
+        unread_count=Case(
+            When(user_id=message.sender_id, then=F('unread_count')),
+            default=F('unread_count') + 1,
+        ),
+    )
+    if not updated:
+        # Özet tablosundan önce açılmış konuşma, satırları mesajlardan kur
+        rebuild_inbox([message.conversation_id])
+
+
+def mark_read(conversation_id, user_id):
+    """Kullanıcının bu konuşmadaki tüm mesajları okuduğunu işaretler"""
+    InboxEntry.objects.filter(conversation_id=conversation_id, user_id=user_id).update(unread_count=0)
+
+
+def _unread_subquery():
+    unread = Message.objects.filter(
+        conversation_id=OuterRef('conversation_id'), is_read=False
+    ).exclude(sender_id=OuterRef('user_id')).order_by().values('conversation_id').annotate(c=Count('*')).values('c')
+    return Coalesce(Subquery(unread), Value(0))
+
+
+def _snippet_expression():
+    """make_snippet'in SQL karşılığı"""
+    return Case(
+        When(Q(text__isnull=False) & ~Q(text=''), then=Substr('text', 1, SNIPPET_LENGTH)),
+        When(Q(media__isnull=False) & ~Q(media=''), then=Value(MEDIA_SNIPPET)),
+        default=Value(''),
+    )
+
+
+def rebuild_inbox(conversation_ids=None):
+    """Gelen kutusu satırlarını katılımcılardan ve mesajlardan sıfırdan kurar"""
+    participants = Conversation.participants.through.objects.all()
+    entries = InboxEntry.objects.all()
+    if conversation_ids is not None:
+        participants = participants.filter(conversation_id__in=conversation_ids)
+        entries = entries.filter(conversation_id__in=conversation_ids)
+
+    # Katılımcılıktan çıkmış kullanıcıların satırlarını sil, eksikleri ekle
+    entries.exclude(
+        user_id__in=Conversation.participants.through.objects.filter(
+            conversation_id=OuterRef('conversation_id')
+        ).values('customuser_id')
+    ).delete()
+    InboxEntry.objects.bulk_create(
+        [
+            InboxEntry(user_id=user_id, conversation_id=conversation_id, last_activity_at=created_at)
+            for conversation_id, user_id, created_at in participants.values_list(
+                'conversation_id', 'customuser_id', 'conversation__created_at'
+            ).iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    latest = Message.objects.filter(conversation_id=OuterRef('conversation_id')).order_by('-created_at', '-id')
+    created_at = Conversation.objects.filter(pk=OuterRef('conversation_id')).values('created_at')
+    return entries.update(
+        last_message=Subquery(latest.values('id')[:1]),
+        snippet=Coalesce(Subquery(latest.annotate(snippet=_snippet_expression()).values('snippet')[:1]), Value('')),
+        last_activity_at=Coalesce(Subquery(latest.values('created_at')[:1]), Subquery(created_at)),
+        unread_count=_unread_subquery(),
+    )
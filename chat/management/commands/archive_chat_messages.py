@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chat.archive import archive_messages, archivable_messages, get_config
+
+
+class Command(BaseCommand):
+    help = 'Eski ve okunmuş sohbet mesajlarını arşiv tablosuna taşır'
+
+    def add_arguments(self, parser):
+        config = get_config()
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=config['AFTER_DAYS'],
+            help='Bu kadar günden eski mesajları arşivle',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=config['BATCH_SIZE'],
+            help='Tek işlemde taşınacak mesaj sayısı',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Taşımadan yalnızca arşivlenecek mesaj sayısını göster',
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = archivable_messages(before).count()
+            self.stdout.write(f'{count} mesaj arşivlenecek ({before:%Y-%m-%d} öncesi)')
+            return
+
+        moved = archive_messages(before, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{moved} mesaj arşive taşındı ({before:%Y-%m-%d} öncesi)'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from chat.models import Conversation
+
+
+class Command(BaseCommand):
+    help = 'İki kişilik konuşmaların (user_low, user_high) anahtarlarını katılımcılardan doldurur'
+
+    def handle(self, *args, **options):
+        pairs = (
+            Conversation.participants.through.objects.filter(conversation__user_low__isnull=True)
+            .values('conversation_id')
+            .annotate(members=Count('customuser_id'), low=Min('customuser_id'), high=Max('customuser_id'))
+            .filter(members=2)
+            .order_by('conversation_id')
+        )
+        taken = set(
+            Conversation.objects.filter(user_low__isnull=False).values_list('user_low_id', 'user_high_id')
+        )
+
+        to_update = []
+        duplicates = []
+        for row in pairs.iterator():
+            key = (row['low'], row['high'])
+            if key in taken:
+                # Aynı çift için daha önce açılmış konuşma var, en eskisi anahtarı alır
+                duplicates.append(row['conversation_id'])
+                continue
+            taken.add(key)
+            to_update.append(Conversation(id=row['conversation_id'], user_low_id=key[0], user_high_id=key[1]))
+
+        with transaction.atomic():
+            Conversation.objects.bulk_update(to_update, ['user_low', 'user_high'], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(to_update)} konuşmanın anahtarı dolduruldu'))
+        if duplicates:
+            self.stdout.write(self.style.WARNING(
+                f'{len(duplicates)} yinelenen konuşma anahtarsız bırakıldı: {duplicates[:20]}'
+            ))
@@ -0,0 +1,272 @@
+"""
+Sohbet uç noktaları için yük testi.
+
+Varsayılan olarak geçici bir test veritabanı kurar ve istekleri Django test
+istemcisiyle sırayla çalıştırır; bu modda istek başına sorgu sayısı da
+ölçülür. --base-url verilirse aynı senaryo çalışan bir sunucuya HTTP ile,
+--concurrency kadar thread ile uygulanır. Bu durumda kullanıcılar sunucunun
+kullandığı veritabanında loadtest<N> adıyla oluşturulur veya yeniden kullanılır.
+
+Örnek:
+    python manage.py chat_loadtest --users 50 --requests 2000
+    python manage.py chat_loadtest --base-url http://127.0.0.1:8000 --concurrency 8 --rate 100
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings, setup_databases, teardown_databases
+from django.urls import resolve
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import CustomUser
+
+DEFAULT_MIX = 'open=5,send=45,history=20,read=10,receipt=10,inbox=10'
+API_PREFIX = '/api/chat/'
+
+
+def percentile(values, pct):
+    """Sıralı listede en yakın sıra yöntemiyle yüzdelik"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class TestClientTransport:
+    """İstekleri süreç içinde test istemcisiyle çalıştırır ve sorguları sayar"""
+    measures_queries = True
+
+    def __init__(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+    def request(self, method, path, token, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method.lower())(
+                path, data, format='json', HTTP_AUTHORIZATION=f'Bearer {token}'
+            )
+        body = response.json() if response.get('Content-Type', '').startswith('application/json') else None
+        return response.status_code, body, len(queries)
+
+
+class HttpTransport:
+    """İstekleri çalışan bir sunucuya gönderir; sorgu sayısı ölçülemez"""
+    measures_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token, data=None):
+        if not path.startswith('http'):
+            path = self.base_url + path
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(path, data=body, method=method, headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json',
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            return status, json.loads(payload or b'null'), None
+        except ValueError:
+            return status, None, None
+
+
+class Simulation:
+    def __init__(self, users, transport, mix, scroll_pages, seed):
+        self.users = users
+        self.tokens = {user.id: str(AccessToken.for_user(user)) for user in users}
+        self.transport = transport
+        self.actions, self.weights = zip(*mix.items())
+        self.scroll_pages = scroll_pages
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # Kullanıcı başına bilinen konuşmalar ve son görülen mesaj id'si
+        self.conversations = defaultdict(list)
+        self.last_message = {}
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, user, method, path, data=None):
+        started = time.perf_counter()
+        status, body, query_count = self.transport.request(method, path, self.tokens[user.id], data)
+        elapsed = time.perf_counter() - started
+        endpoint = f'{method} {resolve(urlsplit(path).path).url_name}'
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if query_count is not None:
+                self.queries[endpoint].append(query_count)
+            if status >= 400:
+                self.errors[endpoint] += 1
+        return status, body
+
+    def pick(self):
+        with self.lock:
+            user = self.random.choice(self.users)
+            action = self.random.choices(self.actions, self.weights)[0]
+            conversations = self.conversations[user.id]
+            conversation_id = self.random.choice(conversations) if conversations else None
+            other = self.random.choice([candidate for candidate in self.users if candidate.id != user.id])
+        return user, action, conversation_id, other
+
+    def open_conversation(self, user, other):
+        status, body = self.call(user, 'POST', f'{API_PREFIX}conversations/', {'user_id': other.id})
+        if status < 400 and body:
+            with self.lock:
+                for participant in (user.id, other.id):
+                    if body['id'] not in self.conversations[participant]:
+                        self.conversations[participant].append(body['id'])
+            return body['id']
+        return None
+
+    def step(self):
+        user, action, conversation_id, other = self.pick()
+        if action == 'inbox':
+            self.call(user, 'GET', f'{API_PREFIX}conversations/')
+            return
+        if action == 'open' or conversation_id is None:
+            conversation_id = self.open_conversation(user, other)
+            if action == 'open' or conversation_id is None:
+                return
+
+        messages_url = f'{API_PREFIX}conversations/{conversation_id}/messages/'
+        if action == 'send':
+            status, body = self.call(user, 'POST', messages_url, {'text': f'yük testi {time.time_ns()}'})
+            if status < 400 and body:
+                with self.lock:
+                    self.last_message[conversation_id] = body['id']
+        elif action == 'history':
+            status, body = self.call(user, 'GET', messages_url)
+            for _ in range(self.scroll_pages):
+                if status >= 400 or not body or not body.get('previous'):
+                    break
+                # Sunucunun döndürdüğü tam adres yerine yol ve sorgu kullanılır
+                previous = urlsplit(body['previous'])
+                status, body = self.call(user, 'GET', f'{previous.path}?{previous.query}')
+        elif action == 'read':
+            self.call(user, 'POST', f'{API_PREFIX}conversations/{conversation_id}/mark_messages_read/')
+        elif action == 'receipt':
+            up_to_id = self.last_message.get(conversation_id)
+            if up_to_id is not None:
+                self.call(user, 'POST', f'{API_PREFIX}conversations/{conversation_id}/receipts/', {
+                    'status': 'delivered', 'up_to_id': up_to_id,
+                })
+
+
+class Command(BaseCommand):
+    help = 'Sohbet uç noktalarına eşzamanlı kullanıcı yükü uygular ve gecikme/sorgu istatistiklerini raporlar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Simüle edilen kullanıcı sayısı')
+        parser.add_argument('--requests', type=int, default=1000, help='Toplam senaryo adımı')
+        parser.add_argument(
+            '--mix',
+            default=DEFAULT_MIX,
+            help=f'Eylem ağırlıkları (open, send, history, read, receipt, inbox). Varsayılan: {DEFAULT_MIX}',
+        )
+        parser.add_argument('--scroll-pages', type=int, default=2, help='history adımında geriye kaydırılan sayfa')
+        parser.add_argument('--warmup', type=int, default=50, help='Ölçüme katılmayan ilk adım sayısı')
+        parser.add_argument('--rate', type=float, default=0, help='Saniyede en fazla adım (0: sınırsız)')
+        parser.add_argument('--seed', type=int, default=42, help='Tekrarlanabilir senaryo için rastgele tohum')
+        parser.add_argument('--base-url', help='Çalışan sunucu adresi; verilmezse test istemcisi kullanılır')
+        parser.add_argument('--concurrency', type=int, default=4, help='--base-url ile eşzamanlı thread sayısı')
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            if name.strip() not in ('open', 'send', 'history', 'read', 'receipt', 'inbox'):
+                raise CommandError(f'Bilinmeyen eylem: {name}')
+            try:
+                mix[name.strip()] = float(weight)
+            except ValueError:
+                raise CommandError(f'Geçersiz ağırlık: {part}')
+        if not any(mix.values()):
+            raise CommandError('En az bir eylemin ağırlığı sıfırdan büyük olmalı.')
+        return mix
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('En az 2 kullanıcı gerekli.')
+        mix = self.parse_mix(options['mix'])
+
+        if options['base_url']:
+            users = self.create_users(options['users'])
+            transport = HttpTransport(options['base_url'])
+            self.run(users, transport, mix, options, options['concurrency'])
+            return
+
+        # Geçici test veritabanı; gerçek veritabanına dokunulmaz
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(BACKGROUND_TASKS_EAGER=True, ALLOWED_HOSTS=['*']):
+                users = self.create_users(options['users'])
+                self.run(users, TestClientTransport(), mix, options, 1)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def create_users(self, count):
+        usernames = [f'loadtest{i}' for i in range(count)]
+        existing = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+        CustomUser.objects.bulk_create(
+            CustomUser(username=username, email=f'{username}@loadtest.local', email_verified=True)
+            for username in usernames if username not in existing
+        )
+        return list(CustomUser.objects.filter(username__in=usernames).order_by('id'))
+
+    def run(self, users, transport, mix, options, concurrency):
+        simulation = Simulation(users, transport, mix, options['scroll_pages'], options['seed'])
+        interval = 1 / options['rate'] if options['rate'] else 0
+
+        for _ in range(options['warmup']):
+            simulation.step()
+        simulation.latencies.clear()
+        simulation.queries.clear()
+        simulation.errors.clear()
+
+        total = options['requests']
+        started = time.perf_counter()
+        if concurrency > 1:
+            def worker(index):
+                if interval:
+                    time.sleep(max(0.0, started + index * interval - time.perf_counter()))
+                simulation.step()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(worker, range(total)))
+        else:
+            for index in range(total):
+                if interval:
+                    time.sleep(max(0.0, started + index * interval - time.perf_counter()))
+                simulation.step()
+        elapsed = time.perf_counter() - started
+
+        self.report(simulation, transport, elapsed)
+
+    def report(self, simulation, transport, elapsed):
+        requests = sum(len(values) for values in simulation.latencies.values())
+        self.stdout.write(
+            f'{requests} istek, {elapsed:.2f} sn, {requests / elapsed if elapsed else 0:.1f} istek/sn'
+        )
+        header = f'{"uç nokta":<40} {"adet":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"sorgu":>6} {"hata":>5}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for endpoint in sorted(simulation.latencies):
+            latencies = sorted(simulation.latencies[endpoint])
+            queries = simulation.queries.get(endpoint)
+            query_text = f'{sum(queries) / len(queries):.1f}' if transport.measures_queries and queries else '-'
+            self.stdout.write(
+                f'{endpoint:<40} {len(latencies):>6} '
+                f'{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} '
+                f'{percentile(latencies, 99) * 1000:>8.1f} {query_text:>6} {simulation.errors.get(endpoint, 0):>5}'
+            )
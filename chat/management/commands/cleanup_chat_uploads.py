@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chat.media import expire_uploads, get_config
+
+
+class Command(BaseCommand):
+    help = 'Süresi dolan sohbet medya yükleme oturumlarını ve geçici dosyalarını siler'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=get_config()['UPLOAD_EXPIRY_HOURS'],
+            help='Bu kadar saattir güncellenmeyen oturumları sil',
+        )
+
+    def handle(self, *args, **options):
+        deleted = expire_uploads(timezone.now() - timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'{deleted} yükleme oturumu silindi'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from chat.inbox import rebuild_inbox
+
+
+class Command(BaseCommand):
+    help = 'Gelen kutusu özet tablosunu konuşma ve mesajlardan yeniden kurar'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conversation',
+            type=int,
+            action='append',
+            dest='conversation_ids',
+            help='Sadece verilen konuşma(lar)ı yeniden kur',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = rebuild_inbox(options['conversation_ids'])
+
+        self.stdout.write(self.style.SUCCESS(f'Gelen kutusu yeniden kuruldu: {rows} kayıt'))
@@ -0,0 +1,241 @@
+"""
+Parçalı, kaldığı yerden devam ettirilebilen sohbet medya yüklemeleri.
+
+İstemci önce bir yükleme oturumu açar, dosyayı Upload-Offset başlığıyla
+parça parça gönderir ve en sonda tamamlar. Her parça istek gövdesinden
+doğrudan yapılandırılmış depolamaya (default_storage) ayrı bir nesne olarak
+akıtılır, bellekte veya yerel diskte tutulmaz; böylece parçalar farklı
+worker'lara düşebilir. Parçanın offset'i yazmadan önce veritabanında koşullu
+UPDATE ile sahiplenilir. Tamamlanırken parçalar tek geçişte birleştirilip
+depolamaya yazılır ve aynı geçişte sha256 özeti hesaplanır; aynı içerik daha
+önce yüklendiyse yeni kopya silinip mevcut MediaBlob kullanılır. Küçük
+resimler arka plan kuyruğunda üretilir.
+"""
+import hashlib
+import io
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+from core.tasks import background
+from .models import MediaBlob, MediaUpload
+
+DEFAULTS = {
+    'MAX_UPLOAD_SIZE': 25 * 1024 * 1024,
+    'CHUNK_SIZE': 1024 * 1024,
+    'THUMBNAIL_SIZE': (320, 320),
+    'UPLOAD_EXPIRY_HOURS': 24,
+    # Yarıda kalan bir parçanın sahipliği bu süreden sonra yeniden alınabilir
+    'CHUNK_CLAIM_TIMEOUT': 300,
+}
+READ_SIZE = 64 * 1024
+
+
+class MediaUploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CHAT_MEDIA', {})}
+
+
+def chunk_dir(upload):
+    return f'chat_media/uploads/{upload.id}'
+
+
+def chunk_name(upload, offset):
+    # Sıfır dolgulu offset, ad sırasının dosya sırası olmasını sağlar
+    return f'{chunk_dir(upload)}/{offset:015d}.part'
+
+
+def _chunk_names(upload):
+    try:
+        _, files = default_storage.listdir(chunk_dir(upload))
+    except FileNotFoundError:
+        return []
+    return sorted(f'{chunk_dir(upload)}/{name}' for name in files if name.endswith('.part'))
+
+
+def _delete_chunks(upload):
+    for name in _chunk_names(upload):
+        default_storage.delete(name)
+
+
+class _LimitedStream:
+    """İstek gövdesinden en fazla length bayt okuyan dosya benzeri nesne"""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.size = length
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+class _ChunkReader:
+    """Depolamadaki parçaları sırayla tek bir dosya gibi okur; okunanların sha256 özetini tutar"""
+
+    def __init__(self, names, size):
+        self.names = list(names)
+        self.size = size
+        self.current = None
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        while self.names or self.current:
+            if self.current is None:
+                self.current = default_storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(READ_SIZE if size is None or size < 0 else size)
+            if data:
+                self.digest.update(data)
+                return data
+            self.current.close()
+            self.current = None
+        return b''
+
+
+def start_upload(user, filename, content_type, total_size):
+    max_size = get_config()['MAX_UPLOAD_SIZE']
+    if total_size <= 0:
+        raise MediaUploadError('Geçersiz dosya boyutu.')
+    if total_size > max_size:
+        raise MediaUploadError(f'Dosya en fazla {max_size // (1024 * 1024)} MB olabilir.', status=413)
+    return MediaUpload.objects.create(
+        user=user,
+        filename=os.path.basename(filename)[:255],
+        content_type=(content_type or '')[:100],
+        total_size=total_size,
+    )
+
+
+def append_chunk(upload, offset, length, stream):
+    """
+    length baytlık gövdeyi offset konumundaki parça olarak depolamaya yazar.
+    offset, sunucunun bildiği alınan bayt sayısına eşit olmalıdır; istemci
+    kesintiden sonra bu değeri durum isteğiyle öğrenir. Aynı offset'e eşzamanlı
+    iki parça gelirse yalnızca sahipliği alan yazar, diğeri 409 alır.
+    """
+    if upload.is_complete:
+        raise MediaUploadError('Yükleme zaten tamamlandı.', status=409)
+    if offset != upload.received:
+        raise MediaUploadError(f'Beklenen offset {upload.received}.', status=409)
+    if length <= 0:
+        raise MediaUploadError('Boş parça.')
+    if length > upload.total_size - offset:
+        raise MediaUploadError('Parça bildirilen dosya boyutunu aşıyor.', status=413)
+
+    # Önce offset sahiplenilir, yazma yalnızca sahiplik alındıysa yapılır
+    end = offset + length
+    stale = timezone.now() - timedelta(seconds=get_config()['CHUNK_CLAIM_TIMEOUT'])
+    claimed = MediaUpload.objects.filter(
+        Q(claimed=offset) | Q(updated_at__lt=stale),
+        pk=upload.pk, received=offset, blob__isnull=True,
+    ).update(claimed=end, updated_at=timezone.now())
+    if not claimed:
+        raise MediaUploadError('Yükleme başka bir istekle değişti, durumu yeniden sorgulayın.', status=409)
+
+    name = chunk_name(upload, offset)
+    try:
+        default_storage.delete(name)  # Yarıda kalmış önceki deneme
+        saved = default_storage.save(name, File(_LimitedStream(stream, length), name=name))
+        if saved != name or default_storage.size(saved) != length:
+            default_storage.delete(saved)
+            raise MediaUploadError('Parça eksik alındı, yeniden gönderin.')
+    except Exception:
+        MediaUpload.objects.filter(pk=upload.pk, received=offset, claimed=end).update(claimed=offset)
+        raise
+
+    committed = MediaUpload.objects.filter(pk=upload.pk, received=offset, claimed=end).update(received=end)
+    if not committed:
+        raise MediaUploadError('Yükleme başka bir istekle değişti, durumu yeniden sorgulayın.', status=409)
+    upload.received = upload.claimed = end
+    return length
+
+
+def complete_upload(upload):
+    """Yüklemeyi sha256 ile tekilleştirilen MediaBlob'a dönüştürür; tekrar çağrılırsa aynı blob'u döndürür"""
+    if upload.is_complete:
+        return upload.blob
+    if upload.received != upload.total_size or upload.claimed != upload.received:
+        raise MediaUploadError(f'Yükleme eksik: {upload.received}/{upload.total_size} bayt.', status=409)
+
+    # Parçalar tek geçişte hem birleştirilip yazılır hem özetlenir. Dosya adı
+    # özetten değil yüklemeden gelir; tekilleştirme MediaBlob.sha256 iledir.
+    reader = _ChunkReader(_chunk_names(upload), upload.total_size)
+    extension = os.path.splitext(upload.filename)[1].lower()[:10]
+    name = default_storage.save(
+        f'chat_media/blobs/{str(upload.id)[:2]}/{upload.id}{extension}', File(reader, name=upload.filename)
+    )
+    sha256 = reader.digest.hexdigest()
+
+    blob = MediaBlob.objects.filter(sha256=sha256).first()
+    if blob is not None:
+        default_storage.delete(name)  # Aynı içerik zaten var
+    else:
+        try:
+            with transaction.atomic():
+                blob = MediaBlob.objects.create(
+                    sha256=sha256, file=name, size=upload.total_size, content_type=upload.content_type
+                )
+        except IntegrityError:
+            # Aynı içerik eşzamanlı tamamlandı, diğer kopyayı kullan
+            default_storage.delete(name)
+            blob = MediaBlob.objects.get(sha256=sha256)
+        else:
+            background.enqueue_on_commit(('chat-thumbnail', blob.id), generate_thumbnail, blob.id)
+
+    upload.blob = blob
+    upload.save(update_fields=['blob', 'updated_at'])
+    _delete_chunks(upload)
+    return blob
+
+
+def get_upload_blob(upload_id, user):
+    """Kullanıcının tamamlanmış yüklemesinin blob'unu döndürür"""
+    upload = MediaUpload.objects.select_related('blob').filter(pk=upload_id, user=user).first()
+    if upload is None:
+        raise MediaUploadError('Yükleme bulunamadı.', status=404)
+    if not upload.is_complete:
+        raise MediaUploadError('Yükleme henüz tamamlanmadı.', status=409)
+    return upload.blob
+
+
+def generate_thumbnail(blob_id):
+    """Resim dosyaları için küçük resim üretir (arka planda çalışır)"""
+    blob = MediaBlob.objects.filter(pk=blob_id).first()
+    if blob is None or blob.thumbnail:
+        return
+    try:
+        with blob.file.open('rb') as source:
+            image = Image.open(source)
+            image.thumbnail(tuple(get_config()['THUMBNAIL_SIZE']))
+            output = io.BytesIO()
+            image.convert('RGB').save(output, format='JPEG', quality=80)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return  # Resim değil veya okunamıyor
+    blob.thumbnail.save(f'{blob.sha256}.jpg', ContentFile(output.getvalue()), save=False)
+    MediaBlob.objects.filter(pk=blob.pk).update(thumbnail=blob.thumbnail.name)
+
+
+def expire_uploads(before):
+    """before'dan beri güncellenmeyen yükleme oturumlarını ve depolamadaki parçalarını siler"""
+    uploads = list(MediaUpload.objects.filter(updated_at__lt=before))
+    for upload in uploads:
+        _delete_chunks(upload)
+    MediaUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    return len(uploads)
@@ -1,8 +1,12 @@
+import uuid
 from django.db import models
 from django.conf import settings
 
 class Conversation(models.Model):
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='conversations')
+    # İki kişilik konuşmanın kanonik anahtarı (küçük id, büyük id); grup konuşmalarında boş
+    user_low = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    user_high = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -10,6 +14,17 @@ class Conversation(models.Model):
         verbose_name = 'Konuşma'
         verbose_name_plural = 'Konuşmalar'
         unique_together = ('id',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_low', 'user_high'],
+                condition=models.Q(user_low__isnull=False, user_high__isnull=False),
+                name='chat_conversation_direct_uniq',
+            ),
+        ]
+
+    @staticmethod
+    def direct_key(user_id, other_user_id):
+        return min(user_id, other_user_id), max(user_id, other_user_id)
 
     def __str__(self):
         return f"Konuşma: {' - '.join([user.username for user in self.participants.all()])}"
@@ -18,6 +33,47 @@ class Conversation(models.Model):
     def last_message(self):
         return self.messages.order_by('-created_at').first()
 
+class MediaBlob(models.Model):
+    """İçerik adresli medya dosyası; aynı içerik (sha256) bir kez saklanır"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='chat_media/blobs/')
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    thumbnail = models.ImageField(upload_to='chat_media/thumbs/', blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Medya Dosyası'
+        verbose_name_plural = 'Medya Dosyaları'
+
+    def __str__(self):
+        return self.sha256
+
+class MediaUpload(models.Model):
+    """Parça parça, kaldığı yerden devam ettirilebilen medya yükleme oturumu"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='media_uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # Yazılmakta olan parçanın sonu; received'den büyükse bir parça yazılıyordur
+    claimed = models.BigIntegerField(default=0)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Medya Yükleme'
+        verbose_name_plural = 'Medya Yüklemeleri'
+
+    def __str__(self):
+        return f"{self.user.username}: {self.filename} ({self.received}/{self.total_size})"
+
+    @property
+    def is_complete(self):
+        return self.blob_id is not None
+
 class Message(models.Model):
     STATUS_CHOICES = [
         ('sending', 'Gönderiliyor'),
@@ -31,6 +87,7 @@ class Message(models.Model):
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sent_messages')
     text = models.TextField(blank=True, null=True)
     media = models.FileField(upload_to='chat_media/', blank=True, null=True)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='messages')
     is_read = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='sent')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -40,6 +97,58 @@ class Message(models.Model):
         verbose_name = 'Mesaj'
         verbose_name_plural = 'Mesajlar'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chat_message_seek_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.username}: {self.text[:30] if self.text else '[Medya]'}" 
+
+class ArchivedMessage(models.Model):
+    """
+    Arşivlenmiş mesaj. Sıcak Message tablosundan taşınan satırlar id'lerini
+    korur; yalnızca sayfalama için gereken indeks tutulur.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archived_messages')
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    text = models.TextField(blank=True, null=True)
+    media = models.FileField(upload_to='chat_media/', blank=True, null=True)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    is_read = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=Message.STATUS_CHOICES, default='sent')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Arşiv Mesajı'
+        verbose_name_plural = 'Arşiv Mesajları'
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chat_archive_seek_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.username}: {self.text[:30] if self.text else '[Medya]'}"
+
+class InboxEntry(models.Model):
+    """Kullanıcının gelen kutusundaki konuşma özeti; liste tek indeksli sorgu ile okunur"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='inbox_entries')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='inbox_entries')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    snippet = models.CharField(max_length=100, blank=True, default='')
+    last_activity_at = models.DateTimeField()
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Gelen Kutusu Kaydı'
+        verbose_name_plural = 'Gelen Kutusu Kayıtları'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'conversation'], name='chat_inbox_user_conversation_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_activity_at', '-id'], name='chat_inbox_feed_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.sender.username}: {self.text[:30] if self.text else '[Medya]'}" 
\ No newline at end of file
+        return f"{self.user.username} - Konuşma {self.conversation_id}"
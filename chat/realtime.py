@@ -0,0 +1,65 @@
+"""
+Sohbet olaylarını WebSocket üzerinden katılımcılara iletir.
+
+Her bağlı kullanıcı kendi ``chat.user.<id>`` grubuna katılır; olaylar
+konuşmanın katılımcılarının gruplarına gönderilir. Gönderim veritabanı işlemi
+commit edildikten sonra yapılır, böylece istemci henüz görünmeyen bir kaydı
+almaz. Kanal katmanı yapılandırılmamışsa olaylar sessizce atlanır.
+"""
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from .models import Conversation
+
+logger = logging.getLogger(__name__)
+
+EVENT_HANDLER = 'chat.event'
+
+
+def user_group(user_id):
+    return f'chat.user.{user_id}'
+
+
+def participant_ids(conversation_id):
+    return list(
+        Conversation.participants.through.objects.filter(conversation_id=conversation_id)
+        .values_list('customuser_id', flat=True)
+    )
+
+
+def send_to_users(user_ids, event, payload):
+    """Olayı verilen kullanıcıların gruplarına hemen gönderir"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    message = {'type': EVENT_HANDLER, 'event': event, 'payload': payload}
+    for user_id in user_ids:
+        try:
+            async_to_sync(channel_layer.group_send)(user_group(user_id), message)
+        except Exception:
+            # Anlık iletim en iyi çaba ile yapılır; istemci REST ile telafi eder
+            logger.exception('%s olayı %s kullanıcısına gönderilemedi', event, user_id)
+
+
+def broadcast(conversation_id, event, payload, exclude_user_id=None):
+    """Olayı commit sonrasında konuşmanın katılımcılarına gönderir"""
+    def send():
+        user_ids = [user_id for user_id in participant_ids(conversation_id) if user_id != exclude_user_id]
+        send_to_users(user_ids, event, payload)
+    transaction.on_commit(send)
+
+
+def broadcast_message(message):
+    from .serializers import MessageSerializer
+    broadcast(message.conversation_id, 'message.new', MessageSerializer(message).data)
+
+
+def broadcast_status(conversation_id, message_ids, status):
+    if not message_ids:
+        return
+    broadcast(conversation_id, 'message.status', {
+        'conversation_id': conversation_id,
+        'message_ids': list(message_ids),
+        'status': status,
+    })
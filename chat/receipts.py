@@ -0,0 +1,74 @@
+"""
+Toplu iletildi/okundu bildirimleri.
+
+Durum yalnızca ileri gider (sent → delivered → read); daha ileri bir durumda
+olan mesajlar dokunulmadan kalır. Bildirim yalnızca kullanıcının aldığı
+mesajlara uygulanır.
+"""
+from django.db import connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+from .models import Message, InboxEntry
+
+RECEIPT_STATUSES = ('delivered', 'read')
+# Her hedef durum için ilerletilebilecek önceki durumlar
+FORWARD_FROM = {
+    'delivered': ('sending', 'sent'),
+    'read': ('sending', 'sent', 'delivered'),
+}
+MAX_RECEIPT_IDS = 500
+
+
+def update_returning_ids(queryset, **changes):
+    """
+    queryset'i tek bir koşullu UPDATE ile günceller ve gerçekten güncellenen
+    satırların id'lerini döndürür. UPDATE ... RETURNING destekleyen
+    veritabanlarında (PostgreSQL, SQLite 3.35+) id'ler aynı sorguda okunur;
+    diğerlerinde adaylar önce okunur ve UPDATE yine koşullu çalışır.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+        query = queryset.query.chain(UpdateQuery)
+        query.add_update_values(changes)
+        compiler = query.get_compiler(queryset.db)
+        compiler.pre_sql_setup()
+        sql, params = compiler.as_sql()
+        pk = connection.ops.quote_name(queryset.model._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(f'{sql} RETURNING {pk}', params)
+            return sorted(row[0] for row in cursor.fetchall())
+    candidates = list(queryset.values_list('pk', flat=True))
+    if not candidates or not queryset.filter(pk__in=candidates).update(**changes):
+        return []
+    # Yarışta atlanan satırlar başka bir bildirimle en az bu duruma ilerlemiştir
+    return candidates
+
+
+def apply_receipts(conversation_id, user, status, up_to_id=None, message_ids=None):
+    """
+    up_to_id'ye kadar (dahil) ya da verilen id'lerdeki mesajları status'a ilerletir.
+    Gerçekten değişen mesajların id'lerini döndürür.
+    """
+    messages = Message.objects.filter(
+        conversation_id=conversation_id, status__in=FORWARD_FROM[status]
+    ).exclude(sender=user)
+    if up_to_id is not None:
+        messages = messages.filter(id__lte=up_to_id)
+    else:
+        messages = messages.filter(id__in=message_ids)
+
+    changes = {'status': status, 'updated_at': timezone.now()}
+    if status == 'read':
+        changes['is_read'] = True
+
+    # Durum koşulu UPDATE'in kendisinde; arada başka bir bildirim mesajı
+    # ilerlettiyse o satır atlanır, durum geri gitmez.
+    with transaction.atomic():
+        updated = update_returning_ids(messages, **changes)
+        if status == 'read' and updated:
+            InboxEntry.objects.filter(conversation_id=conversation_id, user=user).update(
+                unread_count=Greatest(F('unread_count') - len(updated), Value(0))
+            )
+    return updated
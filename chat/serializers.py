@@ -1,14 +1,46 @@
 from rest_framework import serializers
-from .models import Conversation, Message
+from .models import Conversation, Message, InboxEntry, MediaBlob, MediaUpload
+from .media import get_config as get_media_config
 from users.serializers import UserSerializer
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
+    thumbnail = serializers.SerializerMethodField()
     class Meta:
         model = Message
-        fields = ['id', 'conversation', 'sender', 'text', 'media', 'is_read', 'status', 'created_at', 'updated_at']
+        fields = ['id', 'conversation', 'sender', 'text', 'media', 'thumbnail', 'is_read', 'status', 'created_at', 'updated_at']
         read_only_fields = ['id', 'sender', 'conversation', 'created_at', 'updated_at']
 
+    def validate_media(self, value):
+        max_size = get_media_config()['MAX_UPLOAD_SIZE']
+        if value and value.size > max_size:
+            raise serializers.ValidationError(f'Dosya en fazla {max_size // (1024 * 1024)} MB olabilir.')
+        return value
+
+    def get_thumbnail(self, obj):
+        if not obj.blob_id or not obj.blob.thumbnail:
+            return None
+        request = self.context.get('request')
+        url = obj.blob.thumbnail.url
+        return request.build_absolute_uri(url) if request else url
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    upload_id = serializers.UUIDField(source='id', read_only=True)
+    completed = serializers.BooleanField(source='is_complete', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaUpload
+        fields = ['upload_id', 'filename', 'content_type', 'total_size', 'received', 'completed', 'chunk_size']
+
+    def get_chunk_size(self, obj):
+        return get_media_config()['CHUNK_SIZE']
+
+class MediaBlobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MediaBlob
+        fields = ['id', 'sha256', 'file', 'size', 'content_type', 'thumbnail']
+
 class ConversationSerializer(serializers.ModelSerializer):
     participants = UserSerializer(many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
@@ -29,4 +61,22 @@ class ConversationSerializer(serializers.ModelSerializer):
         if user is None:
             return 0
         # Only count messages that are not read and not sent by the current user
-        return obj.messages.filter(is_read=False).exclude(sender=user).count() 
\ No newline at end of file
+        return obj.messages.filter(is_read=False).exclude(sender=user).count() 
+
+class InboxEntrySerializer(serializers.ModelSerializer):
+    """Konuşma listesi; özet satırından okunur, konuşma başına ek sorgu yapmaz"""
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    participants = UserSerializer(source='conversation.participants', many=True, read_only=True)
+    created_at = serializers.DateTimeField(source='conversation.created_at', read_only=True)
+    updated_at = serializers.DateTimeField(source='last_activity_at', read_only=True)
+    last_message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = InboxEntry
+        fields = ['id', 'participants', 'created_at', 'updated_at', 'last_message', 'unread_count']
+
+    def get_last_message(self, obj):
+        # Eski konuşma listesiyle aynı biçim; mesaj ve göndereni sayfa sorgusunda gelir
+        if obj.last_message is None:
+            return None
+        return MessageSerializer(obj.last_message, context=self.context).data
@@ -1,3 +1,498 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.test import APIClient
+from core.asgi import application
+from users.models import CustomUser
+from .media import MediaUploadError, append_chunk, chunk_dir, chunk_name
+from .models import ArchivedMessage, Conversation, Message, InboxEntry, MediaBlob, MediaUpload
+from .receipts import apply_receipts
+from .views import get_or_create_direct_conversation
 
-# Create your tests here.
+
+def create_users(count, prefix='user'):
+    return [
+        CustomUser.objects.create(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', email_verified=True)
+        for i in range(count)
+    ]
+
+
+class ReceiptTests(TestCase):
+
+    def setUp(self):
+        self.sender, self.recipient = create_users(2)
+        self.conversation = get_or_create_direct_conversation(self.sender, self.recipient)
+        self.messages = [
+            Message.objects.create(conversation=self.conversation, sender=self.sender, text=str(i)) for i in range(5)
+        ]
+        self.own = Message.objects.create(conversation=self.conversation, sender=self.recipient, text='kendi')
+        self.client = APIClient()
+        self.client.force_authenticate(self.recipient)
+        self.url = f'/api/chat/conversations/{self.conversation.id}/receipts/'
+
+    def unread(self):
+        return InboxEntry.objects.get(user=self.recipient, conversation=self.conversation).unread_count
+
+    def post(self, data):
+        return self.client.post(self.url, data, format='json')
+
+    def test_receipts_move_forward_only(self):
+        self.assertEqual(self.unread(), 5)
+        response = self.post({'status': 'read', 'message_ids': [self.messages[0].id, self.own.id]})
+        self.assertEqual(response.json()['message_ids'], [self.messages[0].id])
+        self.assertEqual(self.unread(), 4)
+
+        response = self.post({'status': 'delivered', 'up_to_id': self.messages[3].id})
+        self.assertEqual(response.json()['message_ids'], [message.id for message in self.messages[1:4]])
+        response = self.post({'status': 'read', 'up_to_id': self.messages[4].id})
+        self.assertEqual(response.json()['message_ids'], [message.id for message in self.messages[1:]])
+        self.assertEqual(self.unread(), 0)
+        self.assertEqual(self.post({'status': 'delivered', 'up_to_id': self.messages[4].id}).json()['message_ids'], [])
+        self.assertEqual(set(Message.objects.filter(sender=self.sender).values_list('status', flat=True)), {'read'})
+
+    def test_concurrent_read_is_not_overwritten(self):
+        # Başka bir istek okundu bildirimini aday listesi okunduktan sonra uygulamış gibi
+        Message.objects.filter(pk=self.messages[1].pk).update(status='read', is_read=True, updated_at=timezone.now())
+        affected = apply_receipts(self.conversation.id, self.recipient, 'delivered', message_ids=[
+            message.id for message in self.messages[:3]
+        ])
+        self.assertEqual(affected, [self.messages[0].id, self.messages[2].id])
+        self.assertEqual(Message.objects.get(pk=self.messages[1].pk).status, 'read')
+
+    def test_receipt_is_a_single_conditional_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            apply_receipts(self.conversation.id, self.recipient, 'read', up_to_id=self.messages[2].id)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        # Mesajlar için tek UPDATE, gelen kutusu sayacı için tek UPDATE
+        self.assertEqual(len(updates), 2)
+        self.assertIn('"status" IN', updates[0])
+        self.assertEqual(self.unread(), 2)
+
+    def test_mark_read_views_skip_already_read_messages(self):
+        url = f'/api/chat/conversations/{self.conversation.id}/'
+        self.post({'status': 'read', 'message_ids': [self.messages[0].id]})
+        response = self.client.post(url + 'mark_messages_read/')
+        self.assertEqual(response.json()['marked_read'], 4)
+        self.assertEqual(self.client.post(url + 'mark_messages_read/').json()['marked_read'], 0)
+        self.assertEqual(self.client.post(url + 'mark_read/').json()['marked_read'], 0)
+
+        sender = APIClient()
+        sender.force_authenticate(self.sender)
+        self.assertEqual(sender.post(url + 'mark_my_messages_read/').json()['my_messages_read'], 0)
+        self.assertEqual(sender.post(url + 'mark_read/').json()['marked_read'], 1)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.post({'status': 'sent', 'up_to_id': self.messages[0].id}).status_code, 400)
+        self.assertEqual(self.post({'status': 'read'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'read', 'message_ids': ['x']}).status_code, 400)
+        outsider = APIClient()
+        outsider.force_authenticate(create_users(1, prefix='outsider')[0])
+        self.assertEqual(outsider.post(self.url, {'status': 'read', 'up_to_id': 1}, format='json').status_code, 403)
+
+
+class InboxTests(TestCase):
+
+    def setUp(self):
+        self.users = create_users(6)
+        self.owner = self.users[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.conversations = []
+        for i, other in enumerate(self.users[1:5]):
+            conversation_id = self.client.post('/api/chat/conversations/', {'user_id': other.id}, format='json').json()['id']
+            self.conversations.append(conversation_id)
+            for j in range(i + 1):
+                self.client.post(
+                    f'/api/chat/conversations/{conversation_id}/messages/', {'text': f'mesaj {i}-{j} ' + 'x' * 120},
+                    format='json',
+                )
+        reply = APIClient()
+        reply.force_authenticate(self.users[2])
+        reply.post(f'/api/chat/conversations/{self.conversations[1]}/messages/', {'text': 'yanıt'}, format='json')
+
+    def test_list_keeps_message_shape(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/api/chat/conversations/?page_size=2').json()
+        self.assertEqual([entry['id'] for entry in data['results']], [self.conversations[1], self.conversations[3]])
+        first = data['results'][0]
+        self.assertEqual(first['unread_count'], 1)
+        self.assertEqual(first['last_message']['text'], 'yanıt')
+        self.assertEqual(first['last_message']['sender']['username'], self.users[2].username)
+        self.assertIn('media', first['last_message'])
+        self.assertIn('updated_at', first['last_message'])
+        self.assertTrue(data['results'][1]['last_message']['text'].endswith('x' * 120))
+
+        # Sayfa boyutundan bağımsız sabit sorgu sayısı
+        with CaptureQueriesContext(connection) as more_queries:
+            self.client.get('/api/chat/conversations/?page_size=4')
+        self.assertEqual(len(queries), len(more_queries))
+
+    def test_rebuild_matches_incremental_updates(self):
+        legacy = Conversation.objects.create()
+        legacy.participants.add(self.owner, self.users[5])
+        Message.objects.create(conversation=legacy, sender=self.users[5], text='eski')
+        self.client.post(f'/api/chat/conversations/{self.conversations[1]}/mark_messages_read/')
+        fields = ('user_id', 'conversation_id', 'last_message_id', 'snippet', 'unread_count', 'last_activity_at')
+        before = sorted(InboxEntry.objects.values_list(*fields))
+        InboxEntry.objects.all().delete()
+        call_command('rebuild_chat_inbox', stdout=StringIO())
+        self.assertEqual(sorted(InboxEntry.objects.values_list(*fields)), before)
+
+
+MEDIA_TEST_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST_ROOT, BACKGROUND_TASKS_EAGER=True, CHAT_MEDIA={'MAX_UPLOAD_SIZE': 200000})
+class MediaUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEST_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.alice, self.bob = create_users(2)
+        self.conversation = get_or_create_direct_conversation(self.alice, self.bob)
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, 'PNG')
+        self.data = buffer.getvalue()
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def start(self):
+        response = self.client.post('/api/chat/uploads/', {
+            'filename': 'photo.png', 'content_type': 'image/png', 'size': len(self.data),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['upload_id']
+
+    def put(self, upload_id, data, offset):
+        return self.client.put(
+            f'/api/chat/uploads/{upload_id}/', data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_oversized_upload_rejected(self):
+        response = self.client.post('/api/chat/uploads/', {'filename': 'big.png', 'size': 10 ** 7}, format='json')
+        self.assertEqual(response.status_code, 413)
+
+    def test_chunks_are_stored_in_storage_and_deduplicated(self):
+        half = len(self.data) // 2
+        upload_ids = []
+        for _ in range(2):
+            upload_id = self.start()
+            self.assertEqual(self.put(upload_id, self.data[:half], 0).json()['received'], half)
+            self.assertTrue(default_storage.exists(chunk_name(MediaUpload.objects.get(pk=upload_id), 0)))
+            # Aynı offset'in tekrarı ve eksik yüklemenin tamamlanması reddedilir
+            self.assertEqual(self.put(upload_id, self.data[:half], 0).status_code, 409)
+            self.assertEqual(self.client.post(f'/api/chat/uploads/{upload_id}/complete/').status_code, 409)
+            self.assertEqual(self.put(upload_id, self.data[half:] + b'x', half).status_code, 413)
+            self.assertEqual(self.client.get(f'/api/chat/uploads/{upload_id}/').json()['received'], half)
+            self.assertFalse(self.put(upload_id, self.data[half:], half).json()['completed'])
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/chat/uploads/{upload_id}/complete/')
+            self.assertEqual(response.status_code, 200, response.content)
+            upload = MediaUpload.objects.get(pk=upload_id)
+            self.assertEqual(default_storage.listdir(chunk_dir(upload))[1], [])
+            upload_ids.append(upload_id)
+
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        blob = MediaBlob.objects.get()
+        with blob.file.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(Image.open(blob.thumbnail.path).size, (320, 240))
+
+        url = f'/api/chat/conversations/{self.conversation.id}/messages/'
+        response = self.client.post(url, {'text': '', 'upload_id': upload_ids[0]}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(response.json()['media'])
+        self.assertTrue(self.client.get(url).json()['results'][0]['thumbnail'])
+        self.assertEqual(self.client.post(url, {'upload_id': 'nope'}, format='json').status_code, 400)
+        other = APIClient()
+        other.force_authenticate(self.bob)
+        self.assertEqual(other.post(url, {'upload_id': upload_ids[0]}, format='json').status_code, 400)
+
+    def test_completion_reads_chunks_once(self):
+        upload_id = self.start()
+        half = len(self.data) // 2
+        self.put(upload_id, self.data[:half], 0)
+        self.put(upload_id, self.data[half:], half)
+        opened = []
+        original_open = default_storage.open
+
+        def counting_open(name, mode='rb'):
+            opened.append(name)
+            return original_open(name, mode)
+
+        with mock.patch.object(default_storage, 'open', side_effect=counting_open):
+            with self.captureOnCommitCallbacks(execute=False):
+                response = self.client.post(f'/api/chat/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(opened), 2)  # Her parça bir kez
+        self.assertEqual(len(set(opened)), 2)
+
+    def test_claimed_offset_is_not_written_by_a_second_request(self):
+        upload_id = self.start()
+        upload = MediaUpload.objects.get(pk=upload_id)
+        # Başka bir worker aynı offset'i sahiplenmiş ve hâlâ yazıyor
+        MediaUpload.objects.filter(pk=upload_id).update(claimed=100)
+        with self.assertRaises(MediaUploadError) as raised:
+            append_chunk(upload, 0, 100, BytesIO(self.data[:100]))
+        self.assertEqual(raised.exception.status, 409)
+        self.assertFalse(default_storage.exists(chunk_name(upload, 0)))
+        self.assertEqual(MediaUpload.objects.get(pk=upload_id).received, 0)
+
+    def test_short_chunk_releases_the_claim(self):
+        upload_id = self.start()
+        upload = MediaUpload.objects.get(pk=upload_id)
+        with self.assertRaises(MediaUploadError):
+            append_chunk(upload, 0, 100, BytesIO(self.data[:60]))
+        upload.refresh_from_db()
+        self.assertEqual((upload.received, upload.claimed), (0, 0))
+        self.assertFalse(default_storage.exists(chunk_name(upload, 0)))
+        append_chunk(upload, 0, 100, BytesIO(self.data[:100]))
+        self.assertEqual(MediaUpload.objects.get(pk=upload_id).received, 100)
+
+    def test_cleanup_removes_expired_uploads_and_chunks(self):
+        upload_id = self.start()
+        self.put(upload_id, self.data[:100], 0)
+        upload = MediaUpload.objects.get(pk=upload_id)
+        call_command('cleanup_chat_uploads', hours=0, stdout=StringIO())
+        self.assertFalse(MediaUpload.objects.filter(pk=upload_id).exists())
+        self.assertFalse(default_storage.exists(chunk_name(upload, 0)))
+
+
+class MessagePaginationTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = create_users(2)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+        Message.objects.bulk_create(
+            Message(conversation=self.conversation, sender=self.alice, text=str(i)) for i in range(45)
+        )
+        self.ids = list(Message.objects.order_by('id').values_list('id', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+        self.url = f'/api/chat/conversations/{self.conversation.id}/messages/'
+
+    def page_ids(self, page):
+        return [message['id'] for message in page['results']]
+
+    def test_seeks_backward_and_forward_by_id(self):
+        latest = self.client.get(self.url).json()
+        self.assertEqual(self.page_ids(latest), self.ids[-20:])
+        self.assertIsNone(latest['next'])
+
+        with CaptureQueriesContext(connection) as queries:
+            middle = self.client.get(latest['previous']).json()
+        self.assertEqual(self.page_ids(middle), self.ids[5:25])
+        self.assertNotIn('OFFSET', queries.captured_queries[-1]['sql'])
+        oldest = self.client.get(middle['previous']).json()
+        self.assertEqual(self.page_ids(oldest), self.ids[:5])
+        self.assertIsNone(oldest['previous'])
+
+        middle = self.client.get(oldest['next']).json()
+        self.assertEqual(self.page_ids(middle), self.ids[5:25])
+        latest = self.client.get(middle['next']).json()
+        self.assertEqual(self.page_ids(latest), self.ids[25:])
+        self.assertIsNone(latest['next'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url + '?before_id=x').status_code, 404)
+
+
+class DirectConversationTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = create_users(3)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_both_sides_get_the_same_conversation(self):
+        url = '/api/chat/conversations/'
+        first = self.client_for(self.bob).post(url, {'user_id': self.alice.id}, format='json').json()['id']
+        with self.assertNumQueries(5):
+            second = self.client_for(self.alice).post(url, {'user_id': self.bob.id}, format='json').json()['id']
+        self.assertEqual(first, second)
+        conversation = Conversation.objects.get(pk=first)
+        self.assertEqual((conversation.user_low_id, conversation.user_high_id), (self.alice.id, self.bob.id))
+
+    def test_backfill_skips_duplicate_pairs(self):
+        legacy = Conversation.objects.create()
+        legacy.participants.add(self.alice, self.carol)
+        duplicate = Conversation.objects.create()
+        duplicate.participants.add(self.carol, self.alice)
+        call_command('backfill_direct_conversations', stdout=StringIO())
+        legacy.refresh_from_db()
+        duplicate.refresh_from_db()
+        self.assertEqual((legacy.user_low_id, legacy.user_high_id), (self.alice.id, self.carol.id))
+        self.assertIsNone(duplicate.user_low_id)
+
+
+class ConversationAccessTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.outsider = create_users(3)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+        self.message = Message.objects.create(conversation=self.conversation, sender=self.alice, text='Merhaba')
+        self.client = APIClient()
+        self.client.force_authenticate(self.outsider)
+
+    def test_outsider_gets_403_and_missing_objects_404(self):
+        conversation_id = self.conversation.id
+        for action in ('mark_read', 'mark_messages_read', 'mark_my_messages_read'):
+            self.assertEqual(self.client.post(f'/api/chat/conversations/{conversation_id}/{action}/').status_code, 403)
+            self.assertEqual(self.client.post(f'/api/chat/conversations/999/{action}/').status_code, 404)
+        status_url = f'/api/chat/messages/{self.message.id}/status/'
+        self.assertEqual(self.client.post(status_url, {'status': 'read'}).status_code, 403)
+        self.assertEqual(self.client.post('/api/chat/messages/999/status/', {'status': 'read'}).status_code, 404)
+
+        url = f'/api/chat/conversations/{conversation_id}/messages/'
+        self.assertEqual(self.client.get('/api/chat/conversations/999/messages/').status_code, 404)
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        self.assertEqual(self.client.post(url, {'text': 'x'}).status_code, 403)
+
+    def test_participant(self):
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        with self.assertNumQueries(3):
+            page = client.get(f'/api/chat/conversations/{self.conversation.id}/messages/').json()
+        self.assertEqual(len(page['results']), 1)
+        response = client.post(f'/api/chat/messages/{self.message.id}/status/', {'status': 'delivered'})
+        self.assertEqual(response.status_code, 200)
+        response = client.post(f'/api/chat/conversations/{self.conversation.id}/mark_messages_read/')
+        self.assertEqual(response.json()['marked_read'], 1)
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = create_users(2)
+        self.conversation = get_or_create_direct_conversation(self.alice, self.bob)
+        messages = [
+            Message.objects.create(conversation=self.conversation, sender=self.alice if i % 2 else self.bob, text=str(i))
+            for i in range(50)
+        ]
+        self.ids = [message.id for message in messages]
+        # İlk 40 mesaj eski; 7. mesaj okunmadığı için sıcak tabloda kalır
+        old = timezone.now() - timedelta(days=200)
+        for i, message in enumerate(messages[:40]):
+            Message.objects.filter(pk=message.pk).update(created_at=old + timedelta(minutes=i), is_read=i != 7)
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+        self.url = f'/api/chat/conversations/{self.conversation.id}/messages/'
+
+    def archive(self):
+        call_command('archive_chat_messages', '--batch-size', '10', stdout=StringIO())
+
+    def test_moves_old_read_messages(self):
+        call_command('archive_chat_messages', '--dry-run', stdout=StringIO())
+        self.assertEqual(ArchivedMessage.objects.count(), 0)
+        self.archive()
+        self.assertEqual(ArchivedMessage.objects.count(), 39)
+        self.assertEqual(list(Message.objects.filter(id__lt=self.ids[40]).values_list('id', flat=True)), [self.ids[7]])
+        self.assertEqual(InboxEntry.objects.filter(last_message_id=self.ids[-1]).count(), 2)
+
+    def test_pagination_spans_both_tables(self):
+        self.archive()
+        page = self.client.get(self.url).json()
+        seen = []
+        while True:
+            seen = [message['id'] for message in page['results']] + seen
+            if not page['previous']:
+                break
+            with self.assertNumQueries(3):
+                page = self.client.get(page['previous']).json()
+        self.assertEqual(seen, self.ids)
+
+        page = self.client.get(self.url + f'?after_id={self.ids[0]}&page_size=7').json()
+        forward = []
+        while True:
+            forward += [message['id'] for message in page['results']]
+            if not page['next']:
+                break
+            page = self.client.get(page['next']).json()
+        self.assertEqual(forward, self.ids[1:])
+
+        archived = self.client.get(self.url + f'?before_id={self.ids[3]}').json()['results']
+        self.assertEqual([(m['id'], m['text']) for m in archived], [(self.ids[i], str(i)) for i in range(3)])
+
+
+class ChatWebSocketTests(TransactionTestCase):
+    def setUp(self):
+        self.alice, self.bob, self.outsider = create_users(3)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+
+    async def connect(self, user, header=False):
+        token = AccessToken.for_user(user)
+        if header:
+            communicator = WebsocketCommunicator(
+                application, '/ws/chat/', headers=[(b'authorization', f'Bearer {token}'.encode())]
+            )
+        else:
+            communicator = WebsocketCommunicator(application, f'/ws/chat/?token={token}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    def send_and_read(self):
+        sender = APIClient()
+        sender.force_authenticate(self.alice)
+        url = f'/api/chat/conversations/{self.conversation.id}/messages/'
+        self.assertEqual(sender.post(url, {'text': 'Merhaba'}, format='json').status_code, 201)
+        reader = APIClient()
+        reader.force_authenticate(self.bob)
+        reader.post(f'/api/chat/conversations/{self.conversation.id}/mark_messages_read/')
+
+    async def test_invalid_token_is_rejected(self):
+        communicator = WebsocketCommunicator(application, '/ws/chat/?token=nope')
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_ban_is_checked_like_rest(self):
+        past = timezone.now() - timedelta(hours=1)
+        await CustomUser.objects.filter(pk=self.outsider.pk).aupdate(is_banned=True, ban_until=past)
+        self.outsider = await CustomUser.objects.aget(pk=self.outsider.pk)
+        communicator = await self.connect(self.outsider)  # Süresi dolmuş ban
+        await communicator.disconnect()
+
+        await CustomUser.objects.filter(pk=self.outsider.pk).aupdate(ban_until=None)
+        communicator = WebsocketCommunicator(application, f'/ws/chat/?token={AccessToken.for_user(self.outsider)}')
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_events_reach_participants_only(self):
+        bob = await self.connect(self.bob)
+        alice = await self.connect(self.alice, header=True)
+        outsider = await self.connect(self.outsider)
+
+        await outsider.send_json_to({'type': 'typing', 'conversation_id': self.conversation.id})
+        self.assertEqual((await outsider.receive_json_from())['type'], 'error')
+
+        await alice.send_json_to({'type': 'typing', 'conversation_id': self.conversation.id})
+        event = await bob.receive_json_from()
+        self.assertEqual((event['type'], event['user_id']), ('typing', self.alice.id))
+
+        await sync_to_async(self.send_and_read)()
+        event = await bob.receive_json_from()
+        self.assertEqual((event['type'], event['text']), ('message.new', 'Merhaba'))
+        self.assertEqual((await alice.receive_json_from())['type'], 'message.new')
+        event = await alice.receive_json_from()
+        self.assertEqual((event['type'], event['status']), ('message.status', 'read'))
+        self.assertTrue(await outsider.receive_nothing())
+
+        for communicator in (alice, bob, outsider):
+            await communicator.disconnect()
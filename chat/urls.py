@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ConversationListCreateView, MessageListCreateView, MarkConversationReadView, UpdateMessageStatusView, MarkMessagesAsReadView, MarkMyMessagesAsReadView
+from .views import ConversationListCreateView, MessageListCreateView, MarkConversationReadView, UpdateMessageStatusView, MarkMessagesAsReadView, MarkMyMessagesAsReadView, MessageReceiptsView, MediaUploadCreateView, MediaUploadDetailView, MediaUploadCompleteView
 
 urlpatterns = [
     path('conversations/', ConversationListCreateView.as_view(), name='conversation-list-create'),
@@ -7,5 +7,9 @@ urlpatterns = [
     path('conversations/<int:conversation_id>/mark_read/', MarkConversationReadView.as_view(), name='conversation-mark-read'),
     path('conversations/<int:conversation_id>/mark_messages_read/', MarkMessagesAsReadView.as_view(), name='mark-messages-read'),
     path('conversations/<int:conversation_id>/mark_my_messages_read/', MarkMyMessagesAsReadView.as_view(), name='mark-my-messages-read'),
+    path('conversations/<int:conversation_id>/receipts/', MessageReceiptsView.as_view(), name='message-receipts'),
     path('messages/<int:message_id>/status/', UpdateMessageStatusView.as_view(), name='message-status-update'),
+    path('uploads/', MediaUploadCreateView.as_view(), name='media-upload-create'),
+    path('uploads/<uuid:upload_id>/', MediaUploadDetailView.as_view(), name='media-upload-detail'),
+    path('uploads/<uuid:upload_id>/complete/', MediaUploadCompleteView.as_view(), name='media-upload-complete'),
 ] 
\ No newline at end of file
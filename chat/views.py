@@ -1,21 +1,69 @@
+import io
+import logging
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.shortcuts import get_object_or_404
-from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer
+from .models import Conversation, Message, InboxEntry, MediaUpload
+from .serializers import ConversationSerializer, MessageSerializer, InboxEntrySerializer, MediaUploadSerializer, MediaBlobSerializer
+from .media import MediaUploadError, start_upload, append_chunk, complete_upload, get_upload_blob
+from .inbox import ensure_entries, mark_read
+from .access import get_conversation_for_user, get_message_for_user
+from .receipts import apply_receipts, update_returning_ids, RECEIPT_STATUSES, MAX_RECEIPT_IDS
+from .realtime import broadcast_message, broadcast_status
 from users.models import CustomUser
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from core.pagination import KeysetPagination
+
+# Mesaj başına olaylar; LOGGING ayarındaki SamplingFilter ile örneklenir
+event_logger = logging.getLogger('chat.events')
+
+def get_or_create_direct_conversation(user, other_user):
+    """
+    İki kişilik konuşmayı kanonik anahtarla tek indeks okumasıyla bulur, yoksa oluşturur.
+    Eşzamanlı iki istek aynı anda oluşturmaya çalışırsa tekil kısıt birini
+    reddeder ve o istek diğerinin oluşturduğu konuşmayı döndürür.
+    """
+    user_low_id, user_high_id = Conversation.direct_key(user.id, other_user.id)
+    conversation = Conversation.objects.filter(user_low_id=user_low_id, user_high_id=user_high_id).first()
+    if conversation:
+        return conversation
+    try:
+        with transaction.atomic():
+            conversation = Conversation.objects.create(user_low_id=user_low_id, user_high_id=user_high_id)
+            conversation.participants.add(user, other_user)
+            ensure_entries(conversation, {user.id, other_user.id})
+    except IntegrityError:
+        conversation = Conversation.objects.get(user_low_id=user_low_id, user_high_id=user_high_id)
+    return conversation
+
+class InboxPagination(KeysetPagination):
+    ordering = ('-last_activity_at', '-id')
+    page_size = 20
 
 class ConversationListCreateView(generics.ListCreateAPIView):
-    serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InboxPagination
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return InboxEntrySerializer
+        return ConversationSerializer
 
     def get_queryset(self):
-        return Conversation.objects.filter(participants=self.request.user)
+        # Gelen kutusu özet tablosu: (user, -last_activity_at, -id) indeksi üzerinde tek sorgu
+        return InboxEntry.objects.filter(user=self.request.user).select_related(
+            'conversation', 'last_message__sender', 'last_message__blob'
+        ).prefetch_related('conversation__participants')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -30,105 +78,229 @@ class ConversationListCreateView(generics.ListCreateAPIView):
             other_user = CustomUser.objects.get(id=other_user_id)
         except CustomUser.DoesNotExist:
             return Response({'error': 'Kullanıcı bulunamadı.'}, status=404)
-        # Aynı iki kişi arasında birden fazla konuşma olmasın
-        conversation = Conversation.objects.filter(participants=request.user).filter(participants=other_user).first()
-        if not conversation:
-            conversation = Conversation.objects.create()
-            conversation.participants.add(request.user, other_user)
+        # Aynı iki kişi arasında birden fazla konuşma olmasın: (user_low, user_high) tekil indeksi
+        conversation = get_or_create_direct_conversation(request.user, other_user)
         serializer = self.get_serializer(conversation)
         return Response(serializer.data, status=201)
 
-from rest_framework.pagination import PageNumberPagination
+class MessageSeekPagination(KeysetPagination):
+    """
+    Mesaj geçmişi için before_id/after_id ile seek sayfalama.
 
-class MessagePagination(PageNumberPagination):
+    Parametresiz istek en son page_size mesajı, before_id verilen mesajdan
+    eskileri, after_id ise yenileri döndürür. Sonuçlar her zaman eskiden yeniye
+    sıralıdır. Çapa mesajın created_at değeri alt sorgu ile okunur; her sayfa
+    (conversation, created_at, id) indeksi üzerinde tek bir aralık taramasıdır.
+    View get_archive_queryset tanımlıyorsa aynı tarama arşiv tablosunda da
+    yapılır ve iki katmanın sonuçları birleştirilir.
+    """
+    ordering = ('created_at', 'id')
     page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+    before_query_param = 'before_id'
+    after_query_param = 'after_id'
+    invalid_cursor_message = 'Geçersiz mesaj id.'
+
+    def decode_anchor(self, request, models):
+        for param, reverse in ((self.before_query_param, True), (self.after_query_param, False)):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                anchor_id = int(value)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            # Çapa mesaj sıcak tabloda ya da arşivde olabilir
+            created_at = [
+                Subquery(model.objects.filter(pk=anchor_id).order_by().values('created_at')[:1])
+                for model in models
+            ]
+            return reverse, [Coalesce(*created_at) if len(created_at) > 1 else created_at[0], anchor_id]
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        querysets = [queryset]
+        archive = view.get_archive_queryset() if hasattr(view, 'get_archive_queryset') else None
+        if archive is not None:
+            querysets.append(archive)
+        anchor = self.decode_anchor(request, [qs.model for qs in querysets])
+        # Parametresiz ilk yükleme en yeni mesajlardan geriye doğru okur
+        reverse, values = anchor if anchor else (True, None)
+
+        rows = []
+        for qs in querysets:
+            qs = qs.order_by(*(('-created_at', '-id') if reverse else ('created_at', 'id')))
+            if values is not None:
+                qs = qs.filter(self.seek_filter(values, reverse))
+            rows.extend(qs[:page_size + 1])
+        rows.sort(key=lambda row: (row.created_at, row.id), reverse=reverse)
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_previous = has_more if reverse else bool(rows)
+        self.has_next = (anchor is not None and bool(rows)) if reverse else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def _link(self, param, row):
+        url = self.request.build_absolute_uri()
+        for other in (self.before_query_param, self.after_query_param):
+            url = remove_query_param(url, other)
+        return replace_query_param(url, param, row.id)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.after_query_param, self.last_row)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(self.before_query_param, self.first_row)
 
 class MessageListCreateView(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
-    pagination_class = MessagePagination
+    pagination_class = MessageSeekPagination
+
+    def get_conversation(self):
+        if not hasattr(self, '_conversation'):
+            self._conversation = get_conversation_for_user(self.kwargs['conversation_id'], self.request.user)
+        return self._conversation
 
     def get_queryset(self):
-        conversation_id = self.kwargs['conversation_id']
-        conversation = get_object_or_404(Conversation, id=conversation_id)
-        if self.request.user not in conversation.participants.all():
+        conversation = self.get_conversation()
+        if not conversation.is_participant:
             return Message.objects.none()
-        # Mesajları tarih sırasına göre sırala (en eski önce)
-        return conversation.messages.all().order_by('created_at')
+        # Sıralamayı MessageSeekPagination belirler
+        return conversation.messages.select_related('sender', 'blob')
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        
-        # Sayfa numarasını al
-        page = request.query_params.get('page', 1)
-        page_size = int(request.query_params.get('page_size', 20))
+    def get_archive_queryset(self):
+        conversation = self.get_conversation()
+        if not conversation.is_participant:
+            return None
+        return conversation.archived_messages.select_related('sender', 'blob')
+
+    def perform_create(self, serializer):
+        conversation = self.get_conversation()
+        if not conversation.is_participant:
+            raise PermissionDenied('Bu konuşmaya mesaj gönderemezsiniz.')
+        media = {}
+        upload_id = self.request.data.get('upload_id')
+        if upload_id:
+            # Parçalı yüklenmiş dosya: depolamadaki blob'a bağlanır, kopyalanmaz
+            try:
+                blob = get_upload_blob(upload_id, self.request.user)
+            except (MediaUploadError, DjangoValidationError) as e:
+                raise ValidationError({'upload_id': getattr(e, 'message', 'Geçersiz yükleme.')})
+            media = {'blob': blob, 'media': blob.file.name}
+        message = serializer.save(sender=self.request.user, conversation=conversation, status='sent', **media)
+        event_logger.info('Mesaj oluşturuldu', extra={
+            'message_id': message.id,
+            'conversation_id': conversation.id,
+            'sender_id': self.request.user.id,
+            'has_media': bool(message.media),
+        })
+        broadcast_message(message)
         
+        return message
+
+class MediaUploadCreateView(APIView):
+    """Parçalı medya yükleme oturumu açar. Gövde: {"filename", "content_type", "size"}"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            total_size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({'error': 'size gerekli.'}, status=400)
+        try:
+            upload = start_upload(
+                request.user, request.data.get('filename') or 'dosya', request.data.get('content_type'), total_size
+            )
+        except MediaUploadError as e:
+            return Response({'error': e.message}, status=e.status)
+        return Response(MediaUploadSerializer(upload).data, status=201)
+
+class MediaUploadDetailView(APIView):
+    """
+    GET: yüklemenin durumu (kaldığı yerden devam için received).
+    PUT: ham gövdeyi Upload-Offset başlığındaki konumdan itibaren yazar.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, request, upload_id):
+        return MediaUpload.objects.filter(pk=upload_id, user=request.user).first()
+
+    def get(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({'error': 'Yükleme bulunamadı.'}, status=404)
+        return Response(MediaUploadSerializer(upload).data)
+
+    def put(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({'error': 'Yükleme bulunamadı.'}, status=404)
         try:
-            page = int(page)
+            offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset', '')))
         except ValueError:
-            page = 1
-        
-        # Toplam mesaj sayısını al
-        total_messages = queryset.count()
-        
-        # Pagination hesaplamaları
-        if page == 1:
-            # İlk sayfa: En son mesajları göster (WhatsApp gibi)
-            start_index = max(0, total_messages - page_size)
-            messages = list(queryset[start_index:])
-        else:
-            # Eski mesajları yükle (scroll up için)
-            # Sayfa 2: 0'dan (total - 2*page_size)'a kadar
-            # Sayfa 3: 0'dan (total - 3*page_size)'a kadar
-            start_index = 0
-            end_index = max(0, total_messages - ((page - 1) * page_size))
-            messages = list(queryset[start_index:end_index])
-        
-        serializer = self.get_serializer(messages, many=True)
-        
-        # Pagination bilgilerini hazırla
-        has_next = end_index > page_size if page > 1 else total_messages > page_size
-        has_previous = page > 1
-        
+            return Response({'error': 'Upload-Offset başlığı gerekli.'}, status=400)
+        try:
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return Response({'error': 'Content-Length başlığı gerekli.'}, status=411)
+        try:
+            # request.data okunmaz; gövde depolamaya parçalar halinde akıtılır
+            append_chunk(upload, offset, length, request.stream or io.BytesIO())
+        except MediaUploadError as e:
+            return Response({'error': e.message, 'received': upload.received}, status=e.status)
+        return Response(MediaUploadSerializer(upload).data)
+
+class MediaUploadCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        upload = MediaUpload.objects.select_related('blob').filter(pk=upload_id, user=request.user).first()
+        if upload is None:
+            return Response({'error': 'Yükleme bulunamadı.'}, status=404)
+        try:
+            blob = complete_upload(upload)
+        except MediaUploadError as e:
+            return Response({'error': e.message, 'received': upload.received}, status=e.status)
         return Response({
-            'count': total_messages,
-            'next': f"?page={page + 1}" if has_next else None,
-            'previous': f"?page={page - 1}" if has_previous else None,
-            'results': serializer.data
+            'upload_id': str(upload.id),
+            'blob': MediaBlobSerializer(blob, context={'request': request}).data,
         })
 
-    def perform_create(self, serializer):
-        conversation_id = self.kwargs['conversation_id']
-        conversation = get_object_or_404(Conversation, id=conversation_id)
-        if self.request.user not in conversation.participants.all():
-            raise PermissionError('Bu konuşmaya mesaj gönderemezsiniz.')
-        print(f"Gelen veri: {self.request.data}")
-        message = serializer.save(sender=self.request.user, conversation=conversation, status='sent')
-        print(f"Mesaj oluşturuldu: {message.id} - {message.text}")
-        
-        return message
-
 class MarkConversationReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, conversation_id):
-        conversation = get_object_or_404(Conversation, id=conversation_id)
-        if request.user not in conversation.participants.all():
+        conversation = get_conversation_for_user(conversation_id, request.user)
+        if not conversation.is_participant:
             return Response({'error': 'Bu konuşmaya erişiminiz yok.'}, status=403)
-        # Sadece başkasının gönderdiği ve okunmamış mesajları okundu yap
-        updated = conversation.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True, status='read')
-        return Response({'success': True, 'marked_read': updated})
+        # Sadece başkasının gönderdiği ve okunmamış mesajları okundu yap; koşul
+        # UPDATE'in içinde, zaten okunmuş satırlar yeniden yazılmaz
+        unread = conversation.messages.filter(is_read=False).exclude(sender=request.user)
+        message_ids = update_returning_ids(unread, is_read=True, status='read', updated_at=timezone.now())
+        mark_read(conversation.id, request.user.id)
+        broadcast_status(conversation.id, message_ids, 'read')
+        return Response({'success': True, 'marked_read': len(message_ids)})
 
 class UpdateMessageStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, message_id):
         try:
-            message = Message.objects.get(id=message_id)
-            if request.user not in message.conversation.participants.all():
+            message = get_message_for_user(message_id, request.user)
+            if not message.is_participant:
                 return Response({'error': 'Bu mesaja erişiminiz yok.'}, status=403)
             
             new_status = request.data.get('status')
@@ -136,27 +308,67 @@ class UpdateMessageStatusView(APIView):
                 return Response({'error': 'Geçersiz durum.'}, status=400)
             
             message.status = new_status
-            message.save()
+            message.save(update_fields=['status', 'updated_at'])
+            broadcast_status(message.conversation_id, [message.id], new_status)
             
             return Response({'success': True, 'status': new_status})
         except Message.DoesNotExist:
             return Response({'error': 'Mesaj bulunamadı.'}, status=404)
 
+class MessageReceiptsView(APIView):
+    """
+    Toplu iletildi/okundu bildirimi.
+    Gövde: {"status": "delivered" | "read", "up_to_id": N} veya {"status": ..., "message_ids": [...]}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, conversation_id):
+        conversation = get_conversation_for_user(conversation_id, request.user)
+        if not conversation.is_participant:
+            return Response({'error': 'Bu konuşmaya erişiminiz yok.'}, status=403)
+
+        new_status = request.data.get('status')
+        if new_status not in RECEIPT_STATUSES:
+            return Response({'error': 'Geçersiz durum.'}, status=400)
+
+        up_to_id = request.data.get('up_to_id')
+        message_ids = request.data.get('message_ids')
+        try:
+            if up_to_id is not None:
+                up_to_id = int(up_to_id)
+                message_ids = None
+            elif isinstance(message_ids, list) and 0 < len(message_ids) <= MAX_RECEIPT_IDS:
+                message_ids = [int(message_id) for message_id in message_ids]
+            else:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {'error': f'up_to_id veya en fazla {MAX_RECEIPT_IDS} elemanlı message_ids gerekli.'},
+                status=400,
+            )
+
+        affected = apply_receipts(conversation.id, request.user, new_status, up_to_id, message_ids)
+        broadcast_status(conversation.id, affected, new_status)
+        return Response({'success': True, 'status': new_status, 'message_ids': affected})
+
 class MarkMessagesAsReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, conversation_id):
-        conversation = get_object_or_404(Conversation, id=conversation_id)
-        if request.user not in conversation.participants.all():
+        conversation = get_conversation_for_user(conversation_id, request.user)
+        if not conversation.is_participant:
             return Response({'error': 'Bu konuşmaya erişiminiz yok.'}, status=403)
         
         # Sadece karşı tarafın gönderdiği mesajları 'read' yap
-        read_count = conversation.messages.filter(
-            status__in=['sent', 'delivered'],
-            sender__in=conversation.participants.exclude(id=request.user.id)
-        ).update(status='read', is_read=True)
+        unread = conversation.messages.filter(status__in=['sent', 'delivered']).exclude(sender=request.user)
+        message_ids = update_returning_ids(unread, status='read', is_read=True, updated_at=timezone.now())
+        read_count = len(message_ids)
+        mark_read(conversation.id, request.user.id)
+        broadcast_status(conversation.id, message_ids, 'read')
         
-        print(f"Marked {read_count} messages as read for user {request.user.username} in conversation {conversation_id}")
+        event_logger.info('Mesajlar okundu olarak işaretlendi', extra={
+            'conversation_id': conversation.id, 'user_id': request.user.id, 'count': read_count,
+        })
         
         return Response({
             'success': True, 
@@ -168,17 +380,19 @@ class MarkMyMessagesAsReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, conversation_id):
-        conversation = get_object_or_404(Conversation, id=conversation_id)
-        if request.user not in conversation.participants.all():
+        conversation = get_conversation_for_user(conversation_id, request.user)
+        if not conversation.is_participant:
             return Response({'error': 'Bu konuşmaya erişiminiz yok.'}, status=403)
         
         # Kendi mesajlarımızın karşı taraf tarafından okunduğunu işaretle
-        my_messages_read = conversation.messages.filter(
-            sender=request.user,
-            status='sent'
-        ).update(status='read')
+        sent = conversation.messages.filter(sender=request.user, status='sent')
+        message_ids = update_returning_ids(sent, status='read', updated_at=timezone.now())
+        my_messages_read = len(message_ids)
+        broadcast_status(conversation.id, message_ids, 'read')
         
-        print(f"Marked {my_messages_read} of my messages as read by others")
+        event_logger.info('Kendi mesajları okundu olarak işaretlendi', extra={
+            'conversation_id': conversation.id, 'user_id': request.user.id, 'count': my_messages_read,
+        })
         
         return Response({
             'success': True, 
@@ -0,0 +1,9 @@
+"""Denormalize sayaçları (forum/counters.py, users/counters.py) için ortak sorgu yardımcıları"""
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field):
+    """queryset içinde field'ı OuterRef('pk') ile eşleşen satırları sayan skaler alt sorgu; eşleşme yoksa 0"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(c=Count('*')).values('c')
+    return Coalesce(Subquery(counts), Value(0))
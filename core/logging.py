@@ -0,0 +1,102 @@
+"""
+Yapılandırılmış, istek thread'ini bloklamayan loglama.
+
+- JsonFormatter: her kaydı tek satır JSON olarak yazar; ``extra`` ile verilen
+  alanlar da çıktıya eklenir.
+- NonBlockingHandler: kayıtları sınırlı bir kuyruğa bırakır, asıl yazmayı
+  (biçimlendirme dahil) bir QueueListener thread'i yapar. Kuyruk doluysa kayıt
+  düşürülür, istek beklemez.
+- SamplingFilter: yüksek frekanslı olayları verilen oranda örnekler; WARNING
+  ve üzeri kayıtlar her zaman geçer.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# LogRecord'un kendi alanları; bunların dışındakiler extra olarak yazılır
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exception'] = record.exc_text
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class NonBlockingHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler + QueueListener ikilisi. dictConfig'te normal bir handler gibi
+    kullanılır; formatter ve stream arka plandaki StreamHandler'a aktarılır.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Biçimlendirme dinleyici thread'inde yapılır; burada yalnızca mesaj
+        # ve istisna metni sabitlenir ki nesneler sonradan değişmesin
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.target.close()
+        super().close()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    ``loggers`` önekleriyle eşleşen, WARNING altındaki kayıtların yalnızca
+    ``rate`` oranını geçirir. Diğer tüm kayıtlar olduğu gibi geçer.
+    """
+
+    def __init__(self, rate=1.0, loggers=()):
+        super().__init__()
+        self.rate = float(rate)
+        self.loggers = tuple(loggers)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if self.loggers and not record.name.startswith(self.loggers):
+            return True
+        return random.random() < self.rate
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
+    'channels',
     
     # Local apps
     'users',
@@ -84,6 +85,16 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
+
+# WebSocket kanal katmanı (chat/realtime.py)
+# Süreç içi katman tek süreçte ve testlerde çalışır; birden fazla süreçte
+# channels_redis.core.RedisChannelLayer kullanılmalı
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
 
 
 # Database
@@ -97,6 +108,16 @@ DATABASES = {
 }
 
 
+# Cache
+# Süreç içi önbellek; birden fazla süreçte paylaşım için Redis/Memcached backend'i kullanılmalı
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mb-backend',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -154,6 +175,72 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+# Arka plan işleri (core/tasks.py); True ise işler istek içinde hemen çalışır
+BACKGROUND_TASKS_EAGER = False
+
+# Forum sıcak konular sıralaması (forum/ranking.py)
+FORUM_HOT_TOPICS = {
+    'BACKEND': 'local',  # 'redis' için REDIS_URL gerekli
+    'REDIS_URL': os.environ.get('FORUM_HOT_TOPICS_REDIS_URL'),
+    'HALF_LIFE_HOURS': 12,  # None: zaman bozunması yok
+    'WINDOW_HOURS': 24,
+    'RESYNC_SECONDS': 60,
+}
+
+# Loglama (core/logging.py)
+# Kayıtlar JSON satırları olarak arka plandaki bir thread tarafından stdout'a yazılır.
+# chat.events gibi yüksek frekanslı olaylar LOG_SAMPLE_RATE oranında örneklenir.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.logging.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sample_events': {
+            '()': 'core.logging.SamplingFilter',
+            'rate': float(os.environ.get('LOG_SAMPLE_RATE', '0.1')),
+            'loggers': ['chat.events'],
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'core.logging.NonBlockingHandler',
+            'stream': 'ext://sys.stdout',
+            'formatter': 'json',
+            'filters': ['sample_events'],
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Sohbet medya yüklemeleri (chat/media.py)
+CHAT_MEDIA = {
+    'MAX_UPLOAD_SIZE': 25 * 1024 * 1024,  # bayt
+    'CHUNK_SIZE': 1024 * 1024,  # istemciye önerilen parça boyutu
+    'THUMBNAIL_SIZE': (320, 320),
+    'UPLOAD_EXPIRY_HOURS': 24,  # tamamlanmayan oturumlar bu süreden sonra silinir
+    'CHUNK_CLAIM_TIMEOUT': 300,  # saniye; yarıda kalan parçanın offset'i sonra yeniden alınabilir
+}
+
+# Sohbet mesaj arşivi (chat/archive.py)
+CHAT_ARCHIVE = {
+    'AFTER_DAYS': 90,  # bu süreden eski, okunmuş mesajlar arşive taşınır
+    'BATCH_SIZE': 1000,
+}
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
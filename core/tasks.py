@@ -0,0 +1,62 @@
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingQueue:
+    """
+    Süreç içi arka plan iş kuyruğu.
+
+    Aynı anahtarla kuyrukta bekleyen bir iş varsa yeni iş onun yerine geçer,
+    böylece örneğin aynı thread için art arda gelen yüzlerce güncelleme tek
+    bir çalıştırmaya iner. İşler tek bir daemon thread'de sırayla çalışır;
+    BACKGROUND_TASKS_EAGER açıkken (testler) hemen, çağıran thread'de çalışır.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._pending = {}
+        self._keys = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def enqueue(self, key, func, *args):
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            func(*args)
+            return
+        with self._lock:
+            if key not in self._pending:
+                self._keys.put(key)
+            self._pending[key] = (func, args)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f'{self.name}-worker', daemon=True)
+                self._worker.start()
+
+    def enqueue_on_commit(self, key, func, *args):
+        """İşi mevcut veritabanı işlemi commit edildikten sonra kuyruğa ekler"""
+        transaction.on_commit(lambda: self.enqueue(key, func, *args))
+
+    def join(self):
+        """Kuyruktaki tüm işler bitene kadar bekler"""
+        self._keys.join()
+
+    def _run(self):
+        while True:
+            key = self._keys.get()
+            with self._lock:
+                func, args = self._pending.pop(key)
+            close_old_connections()
+            try:
+                func(*args)
+            except Exception:
+                logger.exception('%s: %r işi başarısız oldu', self.name, key)
+            finally:
+                close_old_connections()
+                self._keys.task_done()
+
+
+background = CoalescingQueue('background')
@@ -48,7 +48,7 @@ class ThreadAdmin(admin.ModelAdmin):
     list_display = ('title', 'creator', 'category', 'is_pinned', 'is_locked', 'created_at', 'post_count', 'like_count', 'report_count')
     list_filter = ('category', 'is_pinned', 'is_locked', 'created_at')
     search_fields = ('title', 'creator__username', 'creator__email')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'like_count', 'post_count', 'comment_count')
     list_editable = ('is_pinned', 'is_locked')
     inlines = [PostInline, ReportInline]
     
@@ -69,14 +69,6 @@ class ThreadAdmin(admin.ModelAdmin):
         }),
     )
     
-    def post_count(self, obj):
-        return obj.posts.count()
-    post_count.short_description = 'Post Sayısı'
-    
-    def like_count(self, obj):
-        return obj.likes.count()
-    like_count.short_description = 'Beğeni Sayısı'
-
     def report_count(self, obj):
         return obj.reports.count()
     report_count.short_description = 'Rapor Sayısı'
@@ -86,7 +78,7 @@ class PostAdmin(admin.ModelAdmin):
     list_display = ('author', 'thread_title', 'content_preview', 'is_edited', 'created_at', 'comment_count')
     list_filter = ('is_edited', 'created_at', 'thread__category')
     search_fields = ('content', 'author__username', 'thread__title')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'comment_count')
     list_editable = ('is_edited',)
     inlines = [CommentInline]
     
@@ -110,10 +102,6 @@ class PostAdmin(admin.ModelAdmin):
     def content_preview(self, obj):
         return obj.content[:100] + '...' if len(obj.content) > 100 else obj.content
     content_preview.short_description = 'İçerik Önizleme'
-    
-    def comment_count(self, obj):
-        return obj.comments.count()
-    comment_count.short_description = 'Yorum Sayısı'
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
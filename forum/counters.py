@@ -0,0 +1,52 @@
+from django.db import connection
+from django.db.models import F
+from core.counters import count_subquery
+from .models import Thread, Post, Comment
+
+
+def recount_likes(thread_ids=None):
+    """Beğeni sayaçlarını ara tablodan yeniden hesaplar"""
+    threads = Thread.objects.all()
+    if thread_ids is not None:
+        threads = threads.filter(pk__in=thread_ids)
+    return threads.update(like_count=count_subquery(Thread.likes.through.objects.all(), 'thread_id'))
+
+
+def recount_threads(thread_ids=None):
+    """Thread'lerin beğeni, post ve yorum sayaçlarını tek UPDATE ile yeniden hesaplar"""
+    threads = Thread.objects.all()
+    if thread_ids is not None:
+        threads = threads.filter(pk__in=thread_ids)
+    return threads.update(
+        like_count=count_subquery(Thread.likes.through.objects.all(), 'thread_id'),
+        post_count=count_subquery(Post.objects.all(), 'thread_id'),
+        comment_count=count_subquery(Comment.objects.all(), 'post__thread_id'),
+    )
+
+
+def recount_posts(post_ids=None):
+    """Post'ların yorum sayaçlarını yeniden hesaplar"""
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return posts.update(comment_count=count_subquery(Comment.objects.all(), 'post_id'))
+
+
+def add_likes(thread_id, delta):
+    """
+    like_count'u delta kadar değiştirir ve yeni değeri döndürür; thread yoksa None.
+    UPDATE ... RETURNING destekleyen veritabanlarında (PostgreSQL, SQLite 3.35+)
+    değer aynı sorguda okunur, diğerlerinde ayrıca okunur.
+    """
+    if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+        table = connection.ops.quote_name(Thread._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET "like_count" = "like_count" + %s WHERE "id" = %s RETURNING "like_count"',
+                [delta, thread_id],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+    if not Thread.objects.filter(pk=thread_id).update(like_count=F('like_count') + delta):
+        return None
+    return Thread.objects.values_list('like_count', flat=True).get(pk=thread_id)
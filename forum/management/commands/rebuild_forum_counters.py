@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from forum.counters import recount_threads, recount_posts
+
+
+class Command(BaseCommand):
+    help = 'Thread ve post sayaçlarını (beğeni, post, yorum) sıfırdan yeniden hesaplar'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            post_rows = recount_posts()
+            thread_rows = recount_threads()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Sayaçlar yeniden hesaplandı: {thread_rows} thread, {post_rows} post')
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from forum.moderation import reconcile_report_windows
+
+
+class Command(BaseCommand):
+    help = 'Rapor kayan pencere sayaçlarını son 30 dakikanın raporlarından yeniden kurar'
+
+    def handle(self, *args, **options):
+        targets = reconcile_report_windows()
+        self.stdout.write(self.style.SUCCESS(f'Rapor sayaçları eşitlendi: {targets} hedef'))
@@ -35,10 +35,19 @@ class Thread(models.Model):
     forum_type = models.CharField(max_length=16, choices=FORUM_TYPE_CHOICES, default='genel', verbose_name='Forum Tipi')
     university = models.CharField(max_length=100, blank=True, null=True, verbose_name='Üniversite (Kampüs forumları için)')
     
+    # Sayaçlar (forum/signals.py tarafından güncellenir, rebuild_forum_counters ile yeniden hesaplanır)
+    like_count = models.IntegerField(default=0, verbose_name='Beğeni Sayısı')
+    post_count = models.IntegerField(default=0, verbose_name='Post Sayısı')
+    comment_count = models.IntegerField(default=0, verbose_name='Yorum Sayısı')
+    
     class Meta:
         verbose_name = 'Konu'
         verbose_name_plural = 'Konular'
         ordering = ['-is_pinned', '-created_at']
+        indexes = [
+            models.Index(fields=['-is_pinned', '-created_at', 'id'], name='forum_thread_feed_idx'),
+            models.Index(fields=['university', 'forum_type', '-is_pinned', '-created_at', 'id'], name='forum_thread_campus_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -50,11 +59,15 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_edited = models.BooleanField(default=False, verbose_name='Düzenlendi mi?')
+    comment_count = models.IntegerField(default=0, verbose_name='Yorum Sayısı')
     
     class Meta:
         verbose_name = 'Post'
         verbose_name_plural = 'Postlar'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['thread', 'created_at', 'id'], name='forum_post_thread_seek_idx'),
+        ]
     
     def __str__(self):
         return f"{self.author} - {self.thread.title}"
@@ -71,6 +84,9 @@ class Comment(models.Model):
         verbose_name = 'Yorum'
         verbose_name_plural = 'Yorumlar'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='forum_comment_post_seek_idx'),
+        ]
     
     def __str__(self):
         return f"{self.author} - {self.post}"
@@ -126,7 +142,7 @@ class DailyPopularThread(models.Model):
     
     def update_stats(self):
         """Thread'in güncel istatistiklerini güncelle"""
-        self.like_count = self.thread.likes.count()
-        self.comment_count = Comment.objects.filter(post__thread=self.thread).count()
+        self.like_count = self.thread.like_count
+        self.comment_count = self.thread.comment_count
         self.score = self.like_count * 2 + self.comment_count
         self.save()
@@ -0,0 +1,167 @@
+import time
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from core.tasks import background
+from .models import Thread, Post, Comment, Report
+
+REPORT_WINDOW = timedelta(minutes=30)
+REPORT_BUCKET_SECONDS = 60
+AUTO_ACTION_THRESHOLD = 10
+# Bir hedefin sayacı en geç bu süre içinde veritabanından yeniden kurulur.
+# LocMemCache süreç başınadır; diğer worker'lara düşen raporlar sayaca bu
+# mutabakatla yansır, paylaşımlı bir önbellekte mutabakat hedef başına tektir.
+REPORT_RECONCILE_SECONDS = 60
+
+REPORT_TARGETS = {
+    'thread': Thread,
+    'post': Post,
+    'comment': Comment,
+}
+
+
+class SlidingWindowCounter:
+    """
+    Önbellekte dakikalık kovalarla tutulan kayan pencere sayacı.
+
+    Her olay o anki kovanın sayacını artırır; pencere toplamı son
+    window/bucket_seconds kovanın tek bir get_many ile toplanmasıdır.
+    Kovalar pencere süresi dolunca önbellekten kendiliğinden düşer.
+    """
+
+    def __init__(self, prefix, window=REPORT_WINDOW, bucket_seconds=REPORT_BUCKET_SECONDS):
+        self.prefix = prefix
+        self.window_seconds = int(window.total_seconds())
+        self.bucket_seconds = bucket_seconds
+
+    def _bucket(self, timestamp):
+        return int(timestamp // self.bucket_seconds)
+
+    def _key(self, key, bucket):
+        return f'{self.prefix}:{key}:{bucket}'
+
+    def _bucket_keys(self, key, now):
+        current = self._bucket(now)
+        buckets = self.window_seconds // self.bucket_seconds
+        return [self._key(key, bucket) for bucket in range(current - buckets + 1, current + 1)]
+
+    def incr(self, key, now=None):
+        now = now or time.time()
+        bucket_key = self._key(key, self._bucket(now))
+        cache.add(bucket_key, 0, self.window_seconds + self.bucket_seconds)
+        try:
+            cache.incr(bucket_key)
+        except ValueError:
+            # Kova add ile incr arasında düştüyse yeniden oluştur
+            cache.set(bucket_key, 1, self.window_seconds + self.bucket_seconds)
+        return self.count(key, now)
+
+    def count(self, key, now=None):
+        now = now or time.time()
+        return sum(cache.get_many(self._bucket_keys(key, now)).values())
+
+    def replace(self, key, timestamps, now=None):
+        """Kovaları verilen olay zamanlarından yeniden kurar (DB mutabakatı için)"""
+        now = now or time.time()
+        counts = dict.fromkeys(self._bucket_keys(key, now), 0)
+        for timestamp in timestamps:
+            bucket_key = self._key(key, self._bucket(timestamp))
+            if bucket_key in counts:
+                counts[bucket_key] += 1
+        cache.set_many(counts, self.window_seconds + self.bucket_seconds)
+
+
+report_counter = SlidingWindowCounter('forum:reports')
+
+
+def _seen_key(target_type, target_id, reporter_id):
+    return f'forum:report-seen:{target_type}:{target_id}:{reporter_id}'
+
+
+def _reconciled_key(target_type, target_id):
+    return f'forum:report-reconciled:{target_type}:{target_id}'
+
+
+def _recent_reports(target_type, target_id):
+    since = timezone.now() - REPORT_WINDOW
+    return Report.objects.filter(created_at__gte=since, **{f'{target_type}_id': target_id})
+
+
+def claim_report(target_type, target_id, reporter_id):
+    """
+    Kullanıcı bu hedefi son 30 dakikada raporlamadıysa hakkı ayırır.
+
+    Önbellek yalnızca hızlı yoldur; tekrar raporlama kullanıcıya görünen bir
+    kural olduğu için asıl kontrol veritabanındaki rapor kayıtlarıdır, böylece
+    başka bir worker veya yeniden başlatma sonrası da kesin kalır.
+    """
+    key = _seen_key(target_type, target_id, reporter_id)
+    if not cache.add(key, 1, int(REPORT_WINDOW.total_seconds())):
+        return False
+    if _recent_reports(target_type, target_id).filter(reporter_id=reporter_id).exists():
+        return False
+    return True
+
+
+def release_report(target_type, target_id, reporter_id):
+    cache.delete(_seen_key(target_type, target_id, reporter_id))
+
+
+def record_report(target_type, target_id):
+    """
+    Raporu hedefin kayan pencere sayacına ekler. Eşik aşıldıysa otomatik işlem,
+    sayaç uzun süredir veritabanıyla eşitlenmediyse mutabakat arka plana
+    bırakılır; aynı hedef için art arda gelen işler kuyrukta birleşir.
+    """
+    if report_counter.incr(f'{target_type}:{target_id}') >= AUTO_ACTION_THRESHOLD:
+        background.enqueue_on_commit(
+            ('report-action', target_type, target_id), apply_report_threshold, target_type, target_id
+        )
+    elif cache.add(_reconciled_key(target_type, target_id), 1, REPORT_RECONCILE_SECONDS):
+        background.enqueue_on_commit(
+            ('report-reconcile', target_type, target_id), reconcile_report_target, target_type, target_id
+        )
+
+
+def apply_report_threshold(target_type, target_id):
+    """Eşiği veritabanından doğrular ve hedefi kilitler/gizler (arka planda çalışır)"""
+    if _recent_reports(target_type, target_id).count() < AUTO_ACTION_THRESHOLD:
+        return
+    model = REPORT_TARGETS[target_type]
+    if model is Thread:
+        Thread.objects.filter(pk=target_id).update(is_locked=True)
+    else:
+        model.objects.filter(pk=target_id).update(is_edited=True)  # veya silinebilir
+
+
+def reconcile_report_target(target_type, target_id):
+    """Tek hedefin sayacını veritabanındaki raporlardan yeniden kurar, eşik aşıldıysa işlemi uygular"""
+    timestamps = [
+        created_at.timestamp()
+        for created_at in _recent_reports(target_type, target_id).values_list('created_at', flat=True)
+    ]
+    report_counter.replace(f'{target_type}:{target_id}', timestamps)
+    if len(timestamps) >= AUTO_ACTION_THRESHOLD:
+        apply_report_threshold(target_type, target_id)
+
+
+def reconcile_report_windows():
+    """
+    Son 30 dakikanın raporlarından tüm sayaçları yeniden kurar
+    (reconcile_report_windows komutu). Komut ayrı bir süreçte çalıştığından
+    yalnızca paylaşımlı bir önbellek backend'inde web süreçlerine ulaşır;
+    LocMemCache ile her süreç record_report içindeki mutabakata dayanır.
+    """
+    now = time.time()
+    events = {}
+    rows = Report.objects.filter(created_at__gte=timezone.now() - REPORT_WINDOW).values_list(
+        'thread_id', 'post_id', 'comment_id', 'created_at'
+    )
+    for thread_id, post_id, comment_id, created_at in rows:
+        for target_type, target_id in (('thread', thread_id), ('post', post_id), ('comment', comment_id)):
+            if target_id is not None:
+                events.setdefault(f'{target_type}:{target_id}', []).append(created_at.timestamp())
+                break
+    for key, timestamps in events.items():
+        report_counter.replace(key, timestamps, now)
+    return len(events)
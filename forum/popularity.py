@@ -0,0 +1,147 @@
+import hashlib
+import threading
+import time
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from .models import Thread, DailyPopularThread
+from users.popularity import update_user_popularity
+from .ranking import hot_topics
+
+# Kayıt DAILY_POPULAR_FRESH_SECONDS boyunca taze sayılır, sonrasında en fazla
+# DAILY_POPULAR_CACHE_TIMEOUT'a kadar yenilenirken bayat olarak sunulur.
+# Önbellek süreç başınadır (LocMemCache); başka süreçlerden geçersiz kılınamaz,
+# bu yüzden güncellik bu sürelerle sınırlanır.
+DAILY_POPULAR_FRESH_SECONDS = 60
+DAILY_POPULAR_CACHE_TIMEOUT = 60 * 10
+
+_inflight_guard = threading.Lock()
+_inflight_locks = {}
+
+
+def popular_candidates(since=None):
+    """Son 24 saatte açılmış, en az bir beğeni veya yorumu olan thread'ler"""
+    if since is None:
+        since = timezone.now() - timedelta(hours=24)
+    return Thread.objects.filter(created_at__gte=since).exclude(like_count=0, comment_count=0)
+
+
+def daily_winners(since=None):
+    """Her (forum_type, university) grubunun en yüksek puanlı thread'i, tek sorguda"""
+    score = F('like_count') * 2 + F('comment_count')
+    return popular_candidates(since).annotate(
+        score=score,
+        bucket_rank=Window(
+            RowNumber(),
+            partition_by=[F('forum_type'), F('university')],
+            order_by=[score.desc(), F('created_at').desc()],
+        ),
+    ).filter(bucket_rank=1).order_by()
+
+
+def refresh_thread_popularity(thread_id):
+    """Thread'in günlük popülerlik kaydını, sıcak konu puanını ve sahibinin popülerlik puanını günceller (arka planda çalışır)"""
+    thread = Thread.objects.filter(pk=thread_id).only(
+        'id', 'creator_id', 'created_at', 'forum_type', 'university', 'like_count', 'comment_count'
+    ).first()
+    if thread is None:
+        return
+    hot_topics.update(thread)
+    # Beğeniler thread sahibinin aylık popülerlik puanına girer
+    update_user_popularity([thread.creator_id])
+
+    # Genel forum ve kampüs forumları için günlük popülerlik takibi
+    if thread.university or thread.forum_type == 'genel':
+        DailyPopularThread.objects.update_or_create(
+            thread=thread,
+            date=date.today(),
+            forum_type=thread.forum_type,
+            university=thread.university,
+            defaults={
+                'like_count': thread.like_count,
+                'comment_count': thread.comment_count,
+                'score': thread.like_count * 2 + thread.comment_count,
+            },
+        )
+        refresh_daily_popular(thread.university, thread.forum_type)
+
+
+def daily_popular_cache_key(university, forum_type, day=None):
+    day = day or date.today()
+    digest = hashlib.md5(f'{university}|{forum_type}'.encode()).hexdigest()
+    return f'forum:daily-popular:{day.isoformat()}:{digest}'
+
+
+def compute_daily_popular(university, forum_type):
+    """Bugünün popüler thread'ini veritabanına yazmadan hesaplar"""
+    today = date.today()
+    daily = DailyPopularThread.objects.filter(
+        date=today, forum_type=forum_type, university=university
+    ).order_by('-score').first()
+    if daily:
+        return {
+            'thread_id': daily.thread_id,
+            'like_count': daily.like_count,
+            'comment_count': daily.comment_count,
+            'score': daily.score,
+            'date': today,
+        }
+    # Bugün için kayıt yoksa son 24 saatteki en popüler thread
+    thread = popular_candidates().filter(university=university, forum_type=forum_type).annotate(
+        score=F('like_count') * 2 + F('comment_count')
+    ).order_by('-score', '-created_at').first()
+    if thread is None:
+        return {'thread_id': None, 'date': today}
+    return {
+        'thread_id': thread.id,
+        'like_count': thread.like_count,
+        'comment_count': thread.comment_count,
+        'score': thread.score,
+        'date': today,
+    }
+
+
+def refresh_daily_popular(university, forum_type):
+    """Önbellekteki günlük popüler kaydını yeniden hesaplar (sıralama hattı tarafından çağrılır)"""
+    value = compute_daily_popular(university, forum_type)
+    cache.set(
+        daily_popular_cache_key(university, forum_type),
+        {'value': value, 'fresh_until': time.time() + DAILY_POPULAR_FRESH_SECONDS},
+        DAILY_POPULAR_CACHE_TIMEOUT,
+    )
+    return value
+
+
+def _refresh_lock(key):
+    """Anahtarın yenileme kilidi; kilitler sözlükte kalır, böylece herkes aynı nesneyi bekler"""
+    with _inflight_guard:
+        return _inflight_locks.setdefault(key, threading.Lock())
+
+
+def get_daily_popular(university, forum_type):
+    """
+    Günlük popüler thread'i önbellekten okur. Hesaplamayı süreç içinde aynı
+    anda tek bir istek yapar: kayıt hiç yoksa diğer istekler kilidi bekleyip
+    önbelleği yeniden okur; kayıt bayatladıysa beklemeden bayat kaydı sunar.
+    """
+    entry = cache.get(daily_popular_cache_key(university, forum_type))
+    if entry is not None and entry['fresh_until'] > time.time():
+        return entry['value']
+
+    lock = _refresh_lock((university, forum_type))
+    if entry is not None:
+        if not lock.acquire(blocking=False):
+            return entry['value']  # Başka bir istek yeniliyor
+    else:
+        lock.acquire()
+        # Beklerken başka bir istek hesaplamış olabilir
+        entry = cache.get(daily_popular_cache_key(university, forum_type))
+        if entry is not None:
+            lock.release()
+            return entry['value']
+    try:
+        return refresh_daily_popular(university, forum_type)
+    finally:
+        lock.release()
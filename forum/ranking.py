@@ -0,0 +1,297 @@
+"""
+Sıcak konular (hot topics) için zaman ağırlıklı sıralama.
+
+Her thread için ham puan ``like_count * 2 + comment_count`` olarak tutulur.
+Sıralama anahtarı ``log2(puan) + created_at / yarı_ömür`` şeklindedir; bu
+anahtara göre sıralamak, ``puan * 2 ** (-yaş / yarı_ömür)`` ile sıralamakla
+aynı sonucu verir ama zaman geçtikçe yeniden hesaplama gerektirmez.
+
+İndeks bir sorted set üzerinde tutulur: ayarlarda BACKEND 'redis' ise
+REDIS_URL'deki Redis, aksi halde süreç içi bir skip list kullanılır. Ekleme ve
+silme O(log n)'dir; okuma yalnızca indeksin başından n kayıt okur ve pencere
+dışına düşmüş kayıtları atlar. İndeks RESYNC_SECONDS aralıklarla veritabanındaki
+sayaçlardan yeniden kurulur; bu iş istek yolunda değil arka plan kuyruğunda
+çalışır (süreç içi indeks her süreçte ayrı tutulur).
+"""
+import math
+import random
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from core.tasks import background
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'REDIS_URL': None,
+    'KEY_PREFIX': 'forum:hot',
+    'HALF_LIFE_HOURS': 12,
+    'WINDOW_HOURS': 24,
+    'RESYNC_SECONDS': 60,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'FORUM_HOT_TOPICS', {})}
+
+
+class _SkipNode:
+    __slots__ = ('key', 'forward')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.forward = [None] * level
+
+
+class LocalSortedSet:
+    """
+    Süreç içi sorted set. Üyeler (-anahtar, üye) çiftleriyle bir skip list'te
+    sıralı tutulur: ekleme ve silme beklenen O(log n), ilk n kaydı okumak O(n)'dir.
+    """
+    MAX_LEVEL = 32
+    LEVEL_PROBABILITY = 0.25
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._head = _SkipNode(None, self.MAX_LEVEL)
+        self._level = 1
+        self._entries = {}
+        self._synced_at = None
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.LEVEL_PROBABILITY:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """Her seviyede key'den önce gelen son düğüm"""
+        update = [self._head] * self.MAX_LEVEL
+        node = self._head
+        for level in range(self._level - 1, -1, -1):
+            while node.forward[level] is not None and node.forward[level].key < key:
+                node = node.forward[level]
+            update[level] = node
+        return update
+
+    def _insert(self, key):
+        update = self._path(key)
+        node = _SkipNode(key, self._random_level())
+        self._level = max(self._level, len(node.forward))
+        for level in range(len(node.forward)):
+            node.forward[level] = update[level].forward[level]
+            update[level].forward[level] = node
+
+    def _delete(self, key):
+        update = self._path(key)
+        node = update[0].forward[0]
+        if node is None or node.key != key:
+            return
+        for level in range(len(node.forward)):
+            update[level].forward[level] = node.forward[level]
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+
+    def _discard(self, member):
+        entry = self._entries.pop(member, None)
+        if entry is not None:
+            self._delete((-entry[0], member))
+
+    def set(self, member, rank, raw, created_ts):
+        with self._lock:
+            self._discard(member)
+            self._entries[member] = (rank, raw, created_ts)
+            self._insert((-rank, member))
+
+    def remove(self, members):
+        with self._lock:
+            for member in members:
+                self._discard(member)
+
+    def top(self, n, min_created_ts):
+        result = []
+        with self._lock:
+            node = self._head.forward[0]
+            while node is not None and len(result) < n:
+                member = node.key[1]
+                _, raw, created_ts = self._entries[member]
+                if created_ts >= min_created_ts:
+                    result.append((member, raw))
+                node = node.forward[0]
+        return result
+
+    def replace(self, entries):
+        # Yeni indeks kilit dışında kurulur, okumalar eski indeksten devam eder
+        fresh = LocalSortedSet()
+        for member, rank, raw, created_ts in entries:
+            fresh._entries[member] = (rank, raw, created_ts)
+            fresh._insert((-rank, member))
+        with self._lock:
+            self._head, self._level, self._entries = fresh._head, fresh._level, fresh._entries
+            self._synced_at = time.monotonic()
+
+    def should_sync(self, interval):
+        return self._synced_at is None or time.monotonic() - self._synced_at >= interval
+
+    def needs_initial_build(self):
+        return self._synced_at is None
+
+
+class RedisSortedSet:
+    """Redis sorted set; tüm süreçler aynı indeksi paylaşır"""
+
+    def __init__(self, url, prefix):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('FORUM_HOT_TOPICS Redis backend için redis paketi gerekli.')
+        self._client = redis.Redis.from_url(url)
+        self._rank_key = f'{prefix}:rank'
+        self._created_key = f'{prefix}:created'
+        self._raw_key = f'{prefix}:raw'
+        self._sync_key = f'{prefix}:synced'
+        self._built_key = f'{prefix}:built'
+
+    def set(self, member, rank, raw, created_ts):
+        pipe = self._client.pipeline()
+        pipe.zadd(self._rank_key, {member: rank})
+        pipe.zadd(self._created_key, {member: created_ts})
+        pipe.hset(self._raw_key, member, raw)
+        pipe.execute()
+
+    def remove(self, members):
+        members = list(members)
+        if not members:
+            return
+        pipe = self._client.pipeline()
+        pipe.zrem(self._rank_key, *members)
+        pipe.zrem(self._created_key, *members)
+        pipe.hdel(self._raw_key, *members)
+        pipe.execute()
+
+    def top(self, n, min_created_ts):
+        result = []
+        start = 0
+        while len(result) < n:
+            members = [int(member) for member in self._client.zrevrange(self._rank_key, start, start + n - 1)]
+            if not members:
+                break
+            pipe = self._client.pipeline()
+            for member in members:
+                pipe.zscore(self._created_key, member)
+            created = pipe.execute()
+            raws = self._client.hmget(self._raw_key, members)
+            for member, created_ts, raw in zip(members, created, raws):
+                if created_ts is not None and created_ts >= min_created_ts:
+                    result.append((member, int(raw or 0)))
+            start += n
+        return result[:n]
+
+    def replace(self, entries):
+        pipe = self._client.pipeline()
+        pipe.delete(self._rank_key, self._created_key, self._raw_key)
+        for member, rank, raw, created_ts in entries:
+            pipe.zadd(self._rank_key, {member: rank})
+            pipe.zadd(self._created_key, {member: created_ts})
+            pipe.hset(self._raw_key, member, raw)
+        pipe.set(self._built_key, 1)
+        pipe.execute()
+
+    def should_sync(self, interval):
+        return bool(self._client.set(self._sync_key, 1, nx=True, ex=max(int(interval), 1)))
+
+    def needs_initial_build(self):
+        # İşaret replace ile birlikte yazılır; Redis boşaltılırsa onunla gider
+        return not self._client.exists(self._built_key)
+
+
+class HotTopicsRanking:
+    def __init__(self):
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    @property
+    def config(self):
+        return get_config()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    config = self.config
+                    if config['BACKEND'] == 'redis':
+                        self._backend = RedisSortedSet(config['REDIS_URL'], config['KEY_PREFIX'])
+                    else:
+                        self._backend = LocalSortedSet()
+        return self._backend
+
+    def reset(self):
+        """Backend'i bırakır; bir sonraki kullanımda ayarlardan yeniden kurulur"""
+        self._backend = None
+
+    def window_start(self):
+        return timezone.now() - timedelta(hours=self.config['WINDOW_HOURS'])
+
+    def rank(self, raw, created_at):
+        half_life = self.config['HALF_LIFE_HOURS']
+        if not half_life:
+            return float(raw)
+        return math.log2(raw) + created_at.timestamp() / (half_life * 3600)
+
+    def _entries(self, threads):
+        rows = threads.filter(created_at__gte=self.window_start()).values_list(
+            'id', 'created_at', 'like_count', 'comment_count'
+        )
+        for thread_id, created_at, like_count, comment_count in rows:
+            yield thread_id, created_at, like_count * 2 + comment_count
+
+    def _store(self, thread_id, created_at, raw):
+        if raw > 0:
+            self.backend.set(thread_id, self.rank(raw, created_at), raw, created_at.timestamp())
+        else:
+            self.backend.remove([thread_id])
+
+    def refresh(self, threads):
+        """Verilen thread queryset'inin puanlarını güncel sayaçlardan yeniden yazar"""
+        for thread_id, created_at, raw in self._entries(threads):
+            self._store(thread_id, created_at, raw)
+
+    def update(self, thread):
+        """Sayaçları zaten yüklenmiş tek bir thread'in puanını yazar"""
+        if thread.created_at >= self.window_start():
+            self._store(thread.id, thread.created_at, thread.like_count * 2 + thread.comment_count)
+
+    def remove(self, thread_ids):
+        self.backend.remove(thread_ids)
+
+    def rebuild(self):
+        """İndeksi son WINDOW_HOURS içindeki thread'lerden sıfırdan kurar (pencere dışı kayıtlar düşer)"""
+        from .models import Thread
+        threads = Thread.objects.exclude(like_count=0, comment_count=0)
+        self.backend.replace([
+            (thread_id, self.rank(raw, created_at), raw, created_at.timestamp())
+            for thread_id, created_at, raw in self._entries(threads) if raw > 0
+        ])
+
+    def top(self, n=10):
+        """
+        En sıcak n thread'i (thread_id, ham_puan) olarak döndürür. İndeks hiç
+        kurulmamışsa (yeni süreç, boşaltılmış Redis) ilk kurulum istek içinde
+        yapılır ve eşzamanlı istekler onu bekler; sonraki yeniden kurmalar arka
+        plana bırakılır.
+        """
+        backend = self.backend
+        if backend.needs_initial_build():
+            with self._build_lock:
+                if backend.needs_initial_build():
+                    self.rebuild()
+        elif backend.should_sync(self.config['RESYNC_SECONDS']):
+            background.enqueue(('hot-topics-rebuild',), self.rebuild)
+        return backend.top(n, self.window_start().timestamp())
+
+
+hot_topics = HotTopicsRanking()
@@ -3,41 +3,62 @@ from .models import Thread, Post, Comment, Report
 from users.models import CustomUser
 
 class UserSerializer(serializers.ModelSerializer):
+    is_premium_active = serializers.ReadOnlyField()
+
     class Meta:
         model = CustomUser
-        fields = ['id', 'username', 'email', 'is_premium', 'profile_picture', 'custom_username_color']
+        fields = ['id', 'username', 'email', 'is_premium', 'is_premium_active', 'profile_picture', 'custom_username_color']
+
+class ThreadListSerializer(serializers.ListSerializer):
+    """Sayfadaki thread'ler için isteği yapan kullanıcının beğenilerini tek sorguda çeker"""
+
+    def to_representation(self, data):
+        threads = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        user = request.user if request else None
+        if user and user.is_authenticated:
+            self.context['liked_thread_ids'] = set(
+                Thread.likes.through.objects.filter(
+                    customuser_id=user.id, thread_id__in=[thread.id for thread in threads]
+                ).values_list('thread_id', flat=True)
+            )
+        return super().to_representation(threads)
 
 class ThreadSerializer(serializers.ModelSerializer):
     creator = UserSerializer(read_only=True)
-    likes_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(source='like_count', read_only=True)
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
         model = Thread
-        fields = ['id', 'title', 'creator', 'created_at', 'updated_at', 'is_pinned', 'is_locked', 'category', 'forum_type', 'university', 'likes_count', 'is_liked']
-        read_only_fields = ['creator', 'created_at', 'updated_at', 'likes_count', 'is_liked']
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
+        list_serializer_class = ThreadListSerializer
+        fields = ['id', 'title', 'creator', 'created_at', 'updated_at', 'is_pinned', 'is_locked', 'category', 'forum_type', 'university', 'likes_count', 'post_count', 'comment_count', 'is_liked']
+        read_only_fields = ['creator', 'created_at', 'updated_at', 'likes_count', 'post_count', 'comment_count', 'is_liked']
 
     def get_is_liked(self, obj):
+        liked_thread_ids = self.context.get('liked_thread_ids')
+        if liked_thread_ids is not None:
+            return obj.id in liked_thread_ids
         user = self.context.get('request').user if self.context.get('request') else None
         if user and user.is_authenticated:
-            return obj.likes.filter(id=user.id).exists()
+            return Thread.likes.through.objects.filter(thread_id=obj.id, customuser_id=user.id).exists()
         return False
 
+class CampusThreadSerializer(ThreadSerializer):
+    like_count = serializers.IntegerField(read_only=True)
+
+    class Meta(ThreadSerializer.Meta):
+        fields = ThreadSerializer.Meta.fields + ['like_count']
+        read_only_fields = ThreadSerializer.Meta.read_only_fields + ['like_count']
+
 class PostSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     thread = serializers.PrimaryKeyRelatedField(read_only=True)
-    comment_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = ['id', 'thread', 'author', 'content', 'created_at', 'updated_at', 'is_edited', 'comment_count']
-        read_only_fields = ['author', 'thread', 'created_at', 'updated_at']
-    
-    def get_comment_count(self, obj):
-        return obj.comments.count()
+        read_only_fields = ['author', 'thread', 'created_at', 'updated_at', 'comment_count']
 
 class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
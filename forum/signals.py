@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, QuerySet, Subquery
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Thread, Post, Comment
+from .counters import recount_likes
+from .ranking import hot_topics
+from .popularity import refresh_thread_popularity
+from core.tasks import background
+
+
+def _origin_model(origin):
+    """Silme işlemini başlatan model (instance veya QuerySet)"""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _refresh_hot_topics(threads):
+    """Sıcak konu puanlarını işlem commit edildikten sonra günceller"""
+    transaction.on_commit(lambda: hot_topics.refresh(threads))
+
+
+def _refresh_popularity(thread_id):
+    """Günlük popülerlik ve sıcak konu puanını arka planda günceller"""
+    background.enqueue_on_commit(('thread-popularity', thread_id), refresh_thread_popularity, thread_id)
+
+
+@receiver(m2m_changed, sender=Thread.likes.through)
+def thread_likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Beğeni eklendiğinde/kaldırıldığında like_count sayacını günceller"""
+    if action == 'post_add' and pk_set:
+        # post_add'de pk_set sadece gerçekten eklenen satırları içerir
+        if reverse:
+            Thread.objects.filter(pk__in=pk_set).update(like_count=F('like_count') + 1)
+        else:
+            Thread.objects.filter(pk=instance.pk).update(like_count=F('like_count') + len(pk_set))
+    elif action == 'post_remove' and pk_set:
+        # remove() pk_set'i filtrelemez, bu yüzden etkilenen thread'ler yeniden sayılır
+        recount_likes(pk_set if reverse else [instance.pk])
+    elif action == 'pre_clear' and reverse:
+        instance._cleared_thread_ids = list(instance.liked_threads.values_list('pk', flat=True))
+        return
+    elif action == 'post_clear':
+        if reverse:
+            pk_set = getattr(instance, '_cleared_thread_ids', [])
+            recount_likes(pk_set)
+        else:
+            Thread.objects.filter(pk=instance.pk).update(like_count=0)
+    else:
+        return
+    _refresh_hot_topics(Thread.objects.filter(pk__in=list(pk_set)) if reverse else Thread.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    # Kullanıcı silinince ara tablo satırları sinyalsiz silinir
+    Thread.objects.filter(likes=instance).update(like_count=F('like_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        Thread.objects.filter(pk=instance.thread_id).update(post_count=F('post_count') + 1)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is not Post:
+        return
+    # Post'un yorumları comment_deleted içinde atlandı, toplu düş. Sayı
+    # bellekteki nesneden değil satırdan okunur; nesne eskimiş olabilir.
+    post_comments = Post.objects.filter(pk=instance.pk).values('comment_count')
+    Thread.objects.filter(pk=instance.thread_id).update(
+        comment_count=F('comment_count') - Subquery(post_comments)
+    )
+    _refresh_popularity(instance.thread_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is Thread:
+        return  # Thread zaten siliniyor
+    Thread.objects.filter(pk=instance.thread_id).update(post_count=F('post_count') - 1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') + 1)
+        Thread.objects.filter(posts=instance.post_id).update(comment_count=F('comment_count') + 1)
+        _refresh_popularity(instance.post.thread_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) in (Thread, Post):
+        return  # Üst kayıt siliniyor, sayaçlar post_deleted içinde düşülür
+    Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') - 1)
+    Thread.objects.filter(posts=instance.post_id).update(comment_count=F('comment_count') - 1)
+    _refresh_popularity(instance.post.thread_id)
+
+
+@receiver(post_delete, sender=Thread)
+def thread_deleted(sender, instance, **kwargs):
+    thread_id = instance.pk
+    transaction.on_commit(lambda: hot_topics.remove([thread_id]))
@@ -1,3 +1,649 @@
-from django.test import TestCase
+import json
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import CustomUser, PopularityScore
+from .counters import recount_threads, recount_posts
+from .models import Thread, Post, Comment, Report, DailyPopularThread
+from .moderation import AUTO_ACTION_THRESHOLD, report_counter
+from .popularity import _refresh_lock, daily_popular_cache_key, get_daily_popular, refresh_daily_popular
+from core.tasks import background
+from .ranking import LocalSortedSet, hot_topics
 
-# Create your tests here.
+# Ölçümler bu dosyadaki sınırlarla karşılaştırılır.
+# FORUM_BENCHMARK_UPDATE=1 ile çalıştırılırsa dosya ölçülen değerlerle yeniden yazılır.
+BASELINE_PATH = Path(__file__).with_name('benchmark_baseline.json')
+UPDATE_BASELINE = os.environ.get('FORUM_BENCHMARK_UPDATE') == '1'
+# Süre karşılaştırmasında makine farkları için pay: baseline * 3 + 0.1 sn
+TIME_HEADROOM = 3.0
+TIME_SLACK = 0.1
+
+UNIVERSITIES = ['Boğaziçi Üniversitesi', 'Ege Üniversitesi', 'Hacettepe Üniversitesi']
+USER_COUNT = 50
+THREAD_COUNT = 2000
+POSTS_PER_THREAD = 2
+COMMENTS_PER_POST = 2
+LIKES_PER_THREAD = 3
+
+
+def create_users(count):
+    return CustomUser.objects.bulk_create(
+        CustomUser(username=f'bench{i}', email=f'bench{i}@example.com', email_verified=True, university=UNIVERSITIES[i % len(UNIVERSITIES)])
+        for i in range(count)
+    )
+
+
+def create_threads(users, count):
+    threads = []
+    for i in range(count):
+        campus = i % 2 == 0
+        threads.append(Thread(
+            title=f'Konu {i}',
+            creator=users[i % len(users)],
+            forum_type=['itiraf', 'yardim'][i % 4 // 2] if campus else 'genel',
+            university=UNIVERSITIES[i % len(UNIVERSITIES)] if campus else None,
+            is_pinned=i % 100 == 0,
+        ))
+    return Thread.objects.bulk_create(threads)
+
+
+def create_likes(threads, users, per_thread):
+    Like = Thread.likes.through
+    Like.objects.bulk_create(
+        Like(thread_id=thread.id, customuser_id=users[(thread.id + offset) % len(users)].id)
+        for thread in threads for offset in range(per_thread)
+    )
+
+
+def create_posts(threads, users, per_thread):
+    return Post.objects.bulk_create(
+        Post(thread=thread, author=users[(thread.id + i) % len(users)], content='İçerik')
+        for thread in threads for i in range(per_thread)
+    )
+
+
+def create_comments(posts, users, per_post):
+    return Comment.objects.bulk_create(
+        Comment(post=post, author=users[(post.id + i) % len(users)], content='Yorum')
+        for post in posts for i in range(per_post)
+    )
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ForumQueryBenchmarkTests(TestCase):
+    """Forum uç noktalarının sorgu sayısı ve süre regresyon testleri"""
+
+    baseline = {}
+    measured = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if BASELINE_PATH.exists():
+            cls.baseline = json.loads(BASELINE_PATH.read_text())
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINE and cls.measured:
+            baseline = {**cls.baseline, **cls.measured}
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create sinyal göndermez, sayaçlar sonda toplu hesaplanır
+        cls.users = create_users(USER_COUNT)
+        cls.threads = create_threads(cls.users, THREAD_COUNT)
+        create_likes(cls.threads, cls.users, LIKES_PER_THREAD)
+        cls.posts = create_posts(cls.threads, cls.users, POSTS_PER_THREAD)
+        create_comments(cls.posts, cls.users, COMMENTS_PER_POST)
+        recount_posts()
+        recount_threads()
+        # Sıcak konular için bir kısmını son 24 saate taşı, kalanını eskit
+        Thread.objects.filter(id__in=[thread.id for thread in cls.threads[1::3]]).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+    def setUp(self):
+        cache.clear()
+        hot_topics.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def measure(self, name, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        self.assertLess(response.status_code, 400, response.content[:200])
+
+        self.measured[name] = {'queries': len(queries), 'seconds': round(elapsed, 4)}
+        if UPDATE_BASELINE:
+            return response
+        expected = self.baseline.get(name)
+        self.assertIsNotNone(expected, f'{name} için kayıtlı baseline yok; FORUM_BENCHMARK_UPDATE=1 ile oluşturun.')
+        self.assertLessEqual(
+            len(queries), expected['queries'],
+            f"{name}: {len(queries)} sorgu, baseline {expected['queries']}\n"
+            + '\n'.join(query['sql'] for query in queries.captured_queries),
+        )
+        self.assertLessEqual(
+            elapsed, expected['seconds'] * TIME_HEADROOM + TIME_SLACK,
+            f"{name}: {elapsed:.4f} sn, baseline {expected['seconds']} sn",
+        )
+        return response
+
+    def test_thread_list(self):
+        self.measure('thread_list', 'get', '/api/forum/threads/?page_size=20')
+
+    def test_thread_list_deep_page(self):
+        url = '/api/forum/threads/?page_size=50'
+        for _ in range(20):
+            url = self.client.get(url).json()['next']
+        self.measure('thread_list_deep_page', 'get', url)
+
+    def test_thread_detail(self):
+        self.measure('thread_detail', 'get', f'/api/forum/threads/{self.threads[1].id}/')
+
+    def test_post_list(self):
+        self.measure('post_list', 'get', f'/api/forum/threads/{self.threads[1].id}/posts/')
+
+    def test_comment_list(self):
+        self.measure('comment_list', 'get', f'/api/forum/posts/{self.posts[3].id}/comments/')
+
+    def test_hot_topics(self):
+        response = self.measure('hot_topics', 'get', '/api/forum/threads/hot/')
+        self.assertEqual(len(response.json()), 10)
+
+    def test_campus_threads(self):
+        self.measure(
+            'campus_threads', 'get', '/api/forum/threads/campus/',
+            {'university': UNIVERSITIES[0], 'forum_type': 'itiraf'},
+        )
+
+    def test_campus_daily_popular(self):
+        self.measure(
+            'campus_daily_popular', 'get', '/api/forum/threads/campus/daily-popular/',
+            {'university': UNIVERSITIES[0], 'forum_type': 'itiraf'},
+        )
+
+    def test_thread_like_toggle(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.measure('thread_like_toggle', 'post', f'/api/forum/threads/{self.threads[1].id}/like/')
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ReportModerationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.thread = Thread.objects.create(title='Konu', creator=self.owner)
+
+    def report(self, user, url, category='spam'):
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(url, {'category': category})
+
+    def test_threshold_locks_thread(self):
+        url = f'/api/forum/threads/{self.thread.id}/report/'
+        for i in range(AUTO_ACTION_THRESHOLD):
+            user = CustomUser.objects.create(username=f'reporter{i}', email=f'reporter{i}@example.com')
+            self.assertEqual(self.report(user, url).status_code, 201)
+            self.thread.refresh_from_db()
+            self.assertEqual(self.thread.is_locked, i == AUTO_ACTION_THRESHOLD - 1)
+
+    def test_duplicate_report_rejected_without_cache(self):
+        reporter = CustomUser.objects.create(username='reporter', email='reporter@example.com')
+        url = f'/api/forum/threads/{self.thread.id}/report/'
+        self.assertEqual(self.report(reporter, url).status_code, 201)
+        self.assertEqual(self.report(reporter, url).status_code, 400)
+        # Başka bir worker veya yeniden başlatma: önbellek boş, veritabanı kontrolü geçerli
+        cache.clear()
+        self.assertEqual(self.report(reporter, url).status_code, 400)
+        self.assertEqual(Report.objects.count(), 1)
+
+    def test_threshold_counted_in_cache_between_reconciliations(self):
+        url = f'/api/forum/threads/{self.thread.id}/report/'
+        first, second = [
+            CustomUser.objects.create(username=f'reporter{i}', email=f'reporter{i}@example.com') for i in range(2)
+        ]
+        self.report(first, url)  # İlk rapor sayacı veritabanıyla eşitler
+        with CaptureQueriesContext(connection) as queries:
+            self.report(second, url)
+        counts = [q['sql'] for q in queries.captured_queries if 'COUNT(' in q['sql']]
+        self.assertEqual(counts, [])
+        self.assertEqual(report_counter.count(f'thread:{self.thread.id}'), 2)
+
+    def test_reports_from_other_workers_reach_the_threshold(self):
+        # Diğer worker'lara düşmüş raporlar: bu sürecin sayacında yoklar
+        reporters = [
+            CustomUser.objects.create(username=f'reporter{i}', email=f'reporter{i}@example.com')
+            for i in range(AUTO_ACTION_THRESHOLD)
+        ]
+        Report.objects.bulk_create(
+            Report(thread=self.thread, reporter=reporter, category='spam') for reporter in reporters[1:]
+        )
+        self.report(reporters[0], f'/api/forum/threads/{self.thread.id}/report/')
+        self.thread.refresh_from_db()
+        self.assertTrue(self.thread.is_locked)
+        self.assertEqual(report_counter.count(f'thread:{self.thread.id}'), AUTO_ACTION_THRESHOLD)
+
+    def test_reconcile_command_rebuilds_counters(self):
+        reporter = CustomUser.objects.create(username='reporter', email='reporter@example.com')
+        Report.objects.create(thread=self.thread, reporter=reporter, category='spam')
+        call_command('reconcile_report_windows', stdout=StringIO())
+        self.assertEqual(report_counter.count(f'thread:{self.thread.id}'), 1)
+
+    def test_invalid_report_releases_claim(self):
+        reporter = CustomUser.objects.create(username='reporter', email='reporter@example.com')
+        post = Post.objects.create(thread=self.thread, author=self.owner, content='İçerik')
+        url = f'/api/forum/posts/{post.id}/report/'
+        self.assertEqual(self.report(reporter, url, category='gecersiz').status_code, 400)
+        self.assertEqual(self.report(reporter, url).status_code, 201)
+
+    def test_own_content_cannot_be_reported(self):
+        url = f'/api/forum/threads/{self.thread.id}/report/'
+        self.assertEqual(self.report(self.owner, url).status_code, 400)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class DailyPopularCacheTests(TestCase):
+    url = '/api/forum/threads/campus/daily-popular/?university=X&forum_type=itiraf'
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username='user', email='user@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.first = Thread.objects.create(title='a', creator=self.user, university='X', forum_type='itiraf')
+        self.second = Thread.objects.create(title='b', creator=self.user, university='X', forum_type='itiraf')
+
+    def expire(self):
+        key = daily_popular_cache_key('X', 'itiraf')
+        entry = cache.get(key)
+        cache.set(key, {**entry, 'fresh_until': 0})
+
+    def test_ranking_updates_cached_winner(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(thread=self.second, author=self.user, content='İçerik')
+            Comment.objects.create(post=post, author=self.user, content='Yorum')
+        data = self.client.get(self.url).json()
+        self.assertEqual((data['thread']['title'], data['score']), ('b', 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/forum/threads/{self.first.id}/like/')
+        # Önbellek taze: yalnızca kimlik ve thread okunur
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url).json()
+        self.assertEqual((data['thread']['title'], data['score']), ('a', 2))
+
+    def test_stale_entry_served_while_refreshing(self):
+        get_daily_popular('X', 'itiraf')
+        self.expire()
+        lock = _refresh_lock(('X', 'itiraf'))
+        lock.acquire()
+        try:
+            with self.assertNumQueries(0):
+                self.assertEqual(get_daily_popular('X', 'itiraf')['thread_id'], None)
+        finally:
+            lock.release()
+
+    def test_cold_miss_waits_for_the_running_computation(self):
+        lock = _refresh_lock(('X', 'itiraf'))
+        results = []
+        lock.acquire()
+        try:
+            waiter = threading.Thread(target=lambda: results.append(get_daily_popular('X', 'itiraf')))
+            waiter.start()
+            waiter.join(0.2)
+            self.assertTrue(waiter.is_alive())  # Kilidi bekliyor, kendisi hesaplamıyor
+            Thread.objects.filter(pk=self.second.pk).update(comment_count=3)
+            refresh_daily_popular('X', 'itiraf')
+        finally:
+            lock.release()
+        waiter.join()
+        # Bekleyen istek hesaplananı önbellekten okur
+        self.assertEqual(results[0]['thread_id'], self.second.id)
+
+    def test_stale_entry_recomputed(self):
+        get_daily_popular('X', 'itiraf')
+        Thread.objects.filter(pk=self.second.pk).update(comment_count=3)
+        self.assertIsNone(get_daily_popular('X', 'itiraf')['thread_id'])
+        self.expire()
+        self.assertEqual(get_daily_popular('X', 'itiraf')['thread_id'], self.second.id)
+
+
+class LocalSortedSetTests(TestCase):
+
+    def test_matches_sorted_reference(self):
+        index = LocalSortedSet()
+        reference = {}
+        generator = random.Random(7)
+        for _ in range(2000):
+            member = generator.randrange(300)
+            if generator.random() < 0.3:
+                index.remove([member])
+                reference.pop(member, None)
+            else:
+                rank = generator.random()
+                index.set(member, rank, member, float(member % 10))
+                reference[member] = (rank, float(member % 10))
+        expected = sorted(reference, key=lambda member: (-reference[member][0], member))
+        self.assertEqual([member for member, _ in index.top(len(reference), 0)], expected)
+        # Pencere dışındaki kayıtlar okumada atlanır
+        self.assertEqual(
+            [member for member, _ in index.top(20, 5.0)],
+            [member for member in expected if reference[member][1] >= 5.0][:20],
+        )
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class HotTopicsTests(TestCase):
+
+    def setUp(self):
+        hot_topics.reset()
+        self.users = [CustomUser.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(5)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def hot(self):
+        return [(item['thread']['title'], item['score']) for item in self.client.get('/api/forum/threads/hot/').json()]
+
+    def test_ranking_follows_counters(self):
+        old = Thread.objects.create(title='old', creator=self.users[0])
+        Thread.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(hours=20))
+        new = Thread.objects.create(title='new', creator=self.users[0])
+        stale = Thread.objects.create(title='stale', creator=self.users[0])
+        Thread.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(hours=30))
+        with self.captureOnCommitCallbacks(execute=True):
+            old.likes.add(*self.users[:3])
+            new.likes.add(*self.users[:2])
+            stale.likes.add(*self.users)
+        self.assertEqual(self.hot(), [('new', 4), ('old', 6)])
+
+        # İndeks güncel; sonraki okumalar yeniden kurmadan olaylarla güncellenir
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[4].liked_threads.add(new)
+            post = Post.objects.create(thread=old, author=self.users[1], content='İçerik')
+            Comment.objects.create(post=post, author=self.users[1], content='Yorum')
+        self.assertEqual(self.hot(), [('new', 6), ('old', 7)])
+        with self.captureOnCommitCallbacks(execute=True):
+            new.delete()
+        self.assertEqual(self.hot(), [('old', 7)])
+
+    def test_expired_entries_skipped_without_rebuild(self):
+        thread = Thread.objects.create(title='a', creator=self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            thread.likes.add(self.users[1])
+        self.assertEqual(self.hot(), [('a', 2)])
+        # Pencereden çıkmış kayıt: okuma onu atlar, veritabanına gitmez
+        hot_topics.backend.set(thread.pk, 1.0, 2, (timezone.now() - timedelta(hours=30)).timestamp())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.hot(), [])
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_first_read_builds_index_in_request(self):
+        thread = Thread.objects.create(title='a', creator=self.users[0])
+        Thread.objects.filter(pk=thread.pk).update(like_count=2)  # Sinyalsiz, indekse yazılmaz
+        # Yeni süreç gibi: indeks boş, arka plan kuyruğu henüz çalışmadı
+        hot_topics.reset()
+        with mock.patch.object(background, 'enqueue') as enqueue:
+            self.assertEqual(self.hot(), [('a', 4)])
+            enqueue.assert_not_called()
+
+            # Sonraki yeniden kurmalar isteği bekletmez, kuyruğa bırakılır
+            hot_topics.backend._synced_at -= hot_topics.config['RESYNC_SECONDS']
+            self.assertEqual(self.hot(), [('a', 4)])
+            enqueue.assert_called_once_with(('hot-topics-rebuild',), hot_topics.rebuild)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ThreadLikeToggleTests(TestCase):
+
+    def setUp(self):
+        hot_topics.reset()
+        self.user = CustomUser.objects.create(username='user', email='user@example.com')
+        self.thread = Thread.objects.create(title='Konu', creator=self.user, university='X', forum_type='itiraf')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/forum/threads/{self.thread.id}/like/'
+
+    def toggle(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            data = self.client.post(self.url).json()
+        return data, callbacks
+
+    def test_toggle_updates_counter_and_rankings(self):
+        data, callbacks = self.toggle()
+        self.assertEqual(data, {'liked': True, 'likes_count': 1})
+        # Popülerlik işleri tek, thread başına birleşen bir işte toplanır
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(DailyPopularThread.objects.get().score, 2)
+        self.assertEqual(hot_topics.top(5), [(self.thread.id, 2)])
+        self.assertEqual(PopularityScore.objects.get(user=self.user).thread_likes, 1)
+
+        data, _ = self.toggle()
+        self.assertEqual(data, {'liked': False, 'likes_count': 0})
+        self.assertEqual(DailyPopularThread.objects.get().score, 0)
+        self.assertFalse(PopularityScore.objects.filter(user=self.user).exists())
+        self.assertEqual(self.thread.likes.count(), 0)
+
+    def test_missing_thread(self):
+        self.assertEqual(self.client.post('/api/forum/threads/999/like/').status_code, 404)
+
+
+class ThreadCounterTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob = CustomUser.objects.bulk_create(
+            CustomUser(username=name, email=f'{name}@example.com') for name in ('alice', 'bob')
+        )
+        self.thread = Thread.objects.create(title='Konu', creator=self.alice)
+
+    def counters(self):
+        self.thread.refresh_from_db()
+        return self.thread.like_count, self.thread.post_count, self.thread.comment_count
+
+    def test_like_count_follows_both_sides_of_the_relation(self):
+        self.thread.likes.add(self.alice, self.bob)
+        self.assertEqual(self.counters()[0], 2)
+        self.thread.likes.add(self.alice)  # Zaten beğenmiş, sayılmaz
+        self.assertEqual(self.counters()[0], 2)
+        self.thread.likes.remove(self.alice, self.alice)
+        self.assertEqual(self.counters()[0], 1)
+        self.bob.liked_threads.clear()
+        self.assertEqual(self.counters()[0], 0)
+        self.bob.liked_threads.add(self.thread)
+        self.assertEqual(self.counters()[0], 1)
+
+    def test_post_and_comment_counts(self):
+        first = Post.objects.create(thread=self.thread, author=self.alice, content='İçerik')
+        second = Post.objects.create(thread=self.thread, author=self.bob, content='İçerik')
+        for _ in range(3):
+            Comment.objects.create(post=first, author=self.bob, content='Yorum')
+        Comment.objects.create(post=second, author=self.alice, content='Yorum')
+        self.assertEqual(self.counters(), (0, 2, 4))
+        first.refresh_from_db()
+        self.assertEqual(first.comment_count, 3)
+
+        Comment.objects.filter(post=first).first().delete()
+        self.assertEqual(self.counters(), (0, 2, 3))
+        first.delete()
+        self.assertEqual(self.counters(), (0, 1, 1))
+
+    def test_user_deletion_and_recount(self):
+        self.thread.likes.add(self.bob)
+        Post.objects.create(thread=self.thread, author=self.alice, content='İçerik')
+        post = Post.objects.create(thread=self.thread, author=self.bob, content='İçerik')
+        Comment.objects.create(post=post, author=self.alice, content='Yorum')
+        self.bob.delete()
+        self.assertEqual(self.counters(), (0, 1, 0))
+
+        Thread.objects.filter(pk=self.thread.pk).update(like_count=9, post_count=9, comment_count=9)
+        recount_posts()
+        recount_threads()
+        self.assertEqual(self.counters(), (0, 1, 0))
+
+
+class UpdateDailyPopularCommandTests(TestCase):
+    def setUp(self):
+        self.users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'user{i}', email=f'user{i}@example.com') for i in range(4)
+        )
+        creator = self.users[0]
+        self.general = [Thread.objects.create(title=title, creator=creator) for title in ('a', 'b')]
+        self.campus = [
+            Thread.objects.create(title=title, creator=creator, forum_type='itiraf', university='X')
+            for title in ('c', 'd')
+        ]
+        Thread.objects.create(title='e', creator=creator, forum_type='itiraf', university='Y')
+        a, b = self.general
+        c, d = self.campus
+        a.likes.add(self.users[0])
+        b.likes.add(*self.users[:2])
+        c.likes.add(*self.users)
+        d.likes.add(self.users[0])
+
+    def scores(self):
+        return sorted(DailyPopularThread.objects.values_list('thread__title', 'score'))
+
+    def test_picks_the_top_thread_per_group_in_constant_queries(self):
+        with self.assertNumQueries(5):
+            call_command('update_daily_popular', stdout=StringIO())
+        # Beğenisiz 'e' seçilmez; her grubun en yüksek puanlısı kalır
+        self.assertEqual(self.scores(), [('b', 4), ('c', 8)])
+
+    def test_force_records_the_new_leader_once(self):
+        call_command('update_daily_popular', stdout=StringIO())
+        self.general[0].likes.add(*self.users)
+        call_command('update_daily_popular', stdout=StringIO())
+        self.assertEqual(self.scores(), [('b', 4), ('c', 8)])
+        # --force yeni lideri ekler; tekrar çalıştırmak kopya oluşturmaz
+        call_command('update_daily_popular', '--force', stdout=StringIO())
+        call_command('update_daily_popular', '--force', stdout=StringIO())
+        self.assertEqual(self.scores(), [('a', 8), ('b', 4), ('c', 8)])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.threads = [
+            Thread.objects.create(title=f'Konu {i}', creator=self.user, is_pinned=i % 7 == 0)
+            for i in range(25)
+        ]
+        # Aynı created_at değerleri id ile sıralanmalı
+        Thread.objects.filter(id__in=[t.id for t in self.threads[5:10]]).update(created_at=timezone.now())
+        self.expected = list(
+            Thread.objects.order_by('-is_pinned', '-created_at', 'id').values_list('id', flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_walks_forward_and_backward_without_gaps(self):
+        url = '/api/forum/threads/?page_size=4'
+        seen, last_page = [], None
+        while url:
+            with self.assertNumQueries(2):
+                last_page = self.client.get(url).json()
+            seen += [thread['id'] for thread in last_page['results']]
+            url = last_page['next']
+        self.assertEqual(seen, self.expected)
+
+        url, back = last_page['previous'], []
+        while url:
+            page = self.client.get(url).json()
+            back = [thread['id'] for thread in page['results']] + back
+            url = page['previous']
+        self.assertEqual(back, self.expected[:24])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/forum/threads/?cursor=zzz').status_code, 404)
+
+    def test_post_list(self):
+        post = Post.objects.create(thread=self.threads[0], author=self.user, content='İçerik')
+        page = self.client.get(f'/api/forum/threads/{self.threads[0].id}/posts/').json()
+        self.assertEqual([p['id'] for p in page['results']], [post.id])
+        self.assertIsNone(page['next'])
+
+
+class IsLikedTests(TestCase):
+    def setUp(self):
+        self.user, self.other = CustomUser.objects.bulk_create(
+            CustomUser(username=name, email=f'{name}@example.com') for name in ('reader', 'other')
+        )
+        self.threads = [Thread.objects.create(title=f'Konu {i}', creator=self.other) for i in range(6)]
+        self.threads[4].likes.add(self.user)
+        self.threads[1].likes.add(self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_resolves_likes_in_one_query(self):
+        # Sayfa + tek beğeni sorgusu; thread sayısıyla artmaz
+        with self.assertNumQueries(2):
+            page = self.client.get('/api/forum/threads/?page_size=4').json()
+        liked = {thread['id']: thread['is_liked'] for thread in page['results']}
+        self.assertEqual(liked, {t.id: t is self.threads[4] for t in reversed(self.threads[2:])})
+
+    def test_detail(self):
+        self.assertTrue(self.client.get(f'/api/forum/threads/{self.threads[4].id}/').json()['is_liked'])
+        self.assertFalse(self.client.get(f'/api/forum/threads/{self.threads[1].id}/').json()['is_liked'])
+
+
+class CampusThreadsTests(TestCase):
+    url = '/api/forum/threads/campus/?university=X&forum_type=itiraf'
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='student', email='student@example.com')
+        for i in range(15):
+            thread = Thread.objects.create(title=f'Konu {i}', creator=self.user, university='X', forum_type='itiraf')
+            post = Post.objects.create(thread=thread, author=self.user, content='İçerik')
+            Comment.objects.create(post=post, author=self.user, content='Yorum')
+            thread.likes.add(self.user)
+        Thread.objects.create(title='Diğer', creator=self.user, university='Y', forum_type='itiraf')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_paginated_and_annotated(self):
+        with self.assertNumQueries(2):
+            page = self.client.get(self.url).json()
+        self.assertEqual(len(page['threads']), 10)
+        first = page['threads'][0]
+        self.assertEqual((first['like_count'], first['comment_count'], first['is_liked']), (1, 1, True))
+
+        page = self.client.get(page['next']).json()
+        self.assertEqual(len(page['threads']), 5)
+        self.assertIsNone(page['next'])
+
+    def test_forum_type_required(self):
+        self.assertEqual(self.client.get('/api/forum/threads/campus/?university=X').status_code, 400)
+
+
+class PremiumStatusDisplayTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(
+            username='expired', email='expired@example.com',
+            is_premium=True, premium_expires_at=timezone.now() - timedelta(days=1),
+        )
+        self.thread = Thread.objects.create(title='Konu', creator=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_expired_premium_is_not_active(self):
+        creator = self.client.get(f'/api/forum/threads/{self.thread.id}/').json()['creator']
+        self.assertFalse(creator['is_premium_active'])
+        stats = self.client.get(f'/api/forum/threads/{self.thread.id}/stats/').json()
+        self.assertFalse(stats['creator']['is_premium_active'])
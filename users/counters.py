@@ -0,0 +1,13 @@
+from core.counters import count_subquery
+from .models import CustomUser, Follow
+
+
+def recount_follows(user_ids=None):
+    """Takipçi ve takip edilen sayaçlarını ara tablodan tek UPDATE ile yeniden hesaplar"""
+    users = CustomUser.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    return users.update(
+        followers_count=count_subquery(Follow.objects.all(), 'from_customuser_id'),
+        following_count=count_subquery(Follow.objects.all(), 'to_customuser_id'),
+    )
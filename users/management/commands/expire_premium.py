@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from users.premium import expire_premium, expired_premium_users
+
+
+class Command(BaseCommand):
+    help = 'Süresi dolan premium üyelikleri toplu olarak kapatır; zamanlanmış olarak çalıştırılmalıdır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Değişiklik yapmadan kapatılacak hesap sayısını göster',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = expired_premium_users().count()
+            self.stdout.write(f'Kapatılacak premium üyelik: {count}')
+            return
+
+        count = expire_premium()
+        self.stdout.write(self.style.SUCCESS(f'Süresi dolan premium üyelikler kapatıldı: {count} kullanıcı'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from users.counters import recount_follows
+
+
+class Command(BaseCommand):
+    help = 'Kullanıcıların takipçi ve takip edilen sayaçlarını ara tablodan yeniden hesaplar'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = recount_follows()
+
+        self.stdout.write(self.style.SUCCESS(f'Takip sayaçları yeniden hesaplandı: {rows} kullanıcı'))
@@ -0,0 +1,15 @@
+import time
+from django.core.management.base import BaseCommand
+from users.popularity import refresh_popularity
+
+
+class Command(BaseCommand):
+    help = 'Aylık popüler kullanıcı sıralamasını (PopularityScore) yeniden hesaplar; zamanlanmış olarak çalıştırılmalıdır'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = refresh_popularity()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Popüler kullanıcı sıralaması güncellendi: {rows} kullanıcı ({elapsed:.2f} sn)'
+        ))
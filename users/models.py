@@ -27,7 +27,13 @@ class CustomUser(AbstractUser):
     website = models.URLField(blank=True, null=True)
     
     # Takip sistemi
-    followers = models.ManyToManyField('self', symmetrical=False, related_name='following', blank=True)
+    followers = models.ManyToManyField(
+        'self', symmetrical=False, related_name='following', blank=True,
+        through='Follow', through_fields=('from_customuser', 'to_customuser'),
+    )
+    # Takip sayaçları (users/counters.py ile yeniden hesaplanabilir)
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
     
     # Premium özellikler
     custom_username_color = models.CharField(max_length=7, default='#000000')  # Hex color code
@@ -87,24 +93,13 @@ class CustomUser(AbstractUser):
     
     @property
     def is_premium_active(self):
-        """Premium üyeliğin aktif olup olmadığını kontrol eder"""
+        """
+        Premium üyeliğin aktif olup olmadığını veritabanına dokunmadan hesaplar.
+        Süresi dolan hesapların is_premium bayrağı expire_premium komutuyla toplu kapatılır.
+        """
         if not self.is_premium:
             return False
-        if self.premium_expires_at and self.premium_expires_at < timezone.now():
-            self.is_premium = False
-            self.save()
-            return False
-        return True
-    
-    @property
-    def followers_count(self):
-        """Takipçi sayısını döndürür"""
-        return self.followers.count()
-    
-    @property
-    def following_count(self):
-        """Takip edilen kullanıcı sayısını döndürür"""
-        return self.following.count()
+        return self.premium_expires_at is None or self.premium_expires_at >= timezone.now()
     
     def activate_premium(self, duration_days=30):
         """Premium üyeliği aktifleştirir"""
@@ -149,6 +144,24 @@ class CustomUser(AbstractUser):
         ProfilePictureChange.objects.create(user=self)
 
 
+class Follow(models.Model):
+    """
+    followers ara tablosu: from_customuser takip edilen, to_customuser takip eden.
+    Tablo ve sütunlar otomatik ara tabloyla aynıdır; model yalnızca takip
+    listelerinin seek sayfalaması için indeks tanımlamak üzere açıktır.
+    """
+    from_customuser = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    to_customuser = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        db_table = 'users_customuser_followers'
+        unique_together = [('from_customuser', 'to_customuser')]
+        indexes = [
+            models.Index(fields=['from_customuser', 'id'], name='users_follow_from_seek_idx'),
+            models.Index(fields=['to_customuser', 'id'], name='users_follow_to_seek_idx'),
+        ]
+
+
 class ProfilePictureChange(models.Model):
     """Profil fotoğrafı değişikliklerini takip eder"""
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='profile_picture_changes')
@@ -198,3 +211,27 @@ class Notification(models.Model):
             title='Yeni Takipçi',
             message=f'{follower.username} sizi takip etmeye başladı.'
         )
+
+
+class PopularityScore(models.Model):
+    """Aylık popülerlik sıralaması (users/popularity.py ile yenilenir)"""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='popularity_score')
+    thread_likes = models.IntegerField(default=0)
+    new_followers = models.IntegerField(default=0)
+    popularity = models.IntegerField(default=0)
+    # Filtrelenen sıralamalar için kullanıcıdan kopyalanır
+    university = models.CharField(max_length=100, blank=True, null=True)
+    city = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Popülerlik Puanı'
+        verbose_name_plural = 'Popülerlik Puanları'
+        indexes = [
+            models.Index(fields=['-popularity', 'user'], name='users_popularity_idx'),
+            models.Index(fields=['university', '-popularity', 'user'], name='users_popularity_uni_idx'),
+            models.Index(fields=['city', '-popularity', 'user'], name='users_popularity_city_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.popularity}"
@@ -1,6 +1,16 @@
 from rest_framework import permissions
 from django.utils import timezone
 
+
+def is_ban_active(user, now=None):
+    """Kullanıcı banlı ve ban süresi dolmamışsa True (süresiz banlar dahil)"""
+    if not getattr(user, 'is_banned', False):
+        return False
+    if now is None:
+        now = timezone.now()
+    return user.ban_until is None or user.ban_until > now
+
+
 class IsNotBanned(permissions.BasePermission):
     """
     Kullanıcı banlıysa veya ban süresi dolmamışsa erişimi engeller.
@@ -18,19 +28,18 @@ class IsNotBanned(permissions.BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return True  # Auth gerektirmeyenler için engelleme yok
-        if getattr(user, 'is_banned', False):
-            now = timezone.now()
-            if user.ban_until is None or (user.ban_until and user.ban_until > now):
-                kalan_sure = None
-                if user.ban_until:
-                    kalan_sure = user.ban_until - now
-                self.message = {
-                    'banli': True,
-                    'ban_sebebi': user.ban_reason,
-                    'ban_suresiz': user.ban_until is None,
-                    'ban_bitis': user.ban_until,
-                    'kalan_sure': kalan_sure.total_seconds() if kalan_sure else None,
-                    'mesaj': f"Hesabınız {'süresiz' if user.ban_until is None else 'süreli'} olarak banlanmıştır. {f'Kalan süre: {kalan_sure}' if kalan_sure else ''}"
-                }
-                return False
+        now = timezone.now()
+        if is_ban_active(user, now):
+            kalan_sure = None
+            if user.ban_until:
+                kalan_sure = user.ban_until - now
+            self.message = {
+                'banli': True,
+                'ban_sebebi': user.ban_reason,
+                'ban_suresiz': user.ban_until is None,
+                'ban_bitis': user.ban_until,
+                'kalan_sure': kalan_sure.total_seconds() if kalan_sure else None,
+                'mesaj': f"Hesabınız {'süresiz' if user.ban_until is None else 'süreli'} olarak banlanmıştır. {f'Kalan süre: {kalan_sure}' if kalan_sure else ''}"
+            }
+            return False
         return True 
\ No newline at end of file
@@ -0,0 +1,134 @@
+import hashlib
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.tasks import background
+from forum.models import Thread
+from .counters import Follow
+from .models import CustomUser, PopularityScore
+
+POPULARITY_WINDOW = timedelta(days=30)
+POPULAR_USERS_LIMIT = 10
+POPULAR_USERS_MAX_LIMIT = 50
+POPULAR_USERS_CACHE_TIMEOUT = 60 * 5
+POPULAR_USERS_GENERATION_KEY = 'users:popular:generation'
+
+
+def _thread_likes_subquery(since):
+    """Kullanıcının pencere içinde açtığı thread'lerin beğeni sayısı"""
+    likes = Thread.likes.through.objects.filter(
+        thread__creator_id=OuterRef('pk'), thread__created_at__gte=since
+    ).order_by().values('thread__creator_id').annotate(c=Count('*')).values('c')
+    return Coalesce(Subquery(likes), Value(0))
+
+
+def _new_followers_subquery(since):
+    """Pencere içinde katılmış takipçilerin sayısı (takip tablosunda zaman damgası yok)"""
+    follows = Follow.objects.filter(
+        from_customuser_id=OuterRef('pk'), to_customuser__date_joined__gte=since
+    ).order_by().values('from_customuser_id').annotate(c=Count('*')).values('c')
+    return Coalesce(Subquery(follows), Value(0))
+
+
+def compute_scores(user_ids=None):
+    """
+    Popülerlik puanlarını hesaplar (kaydetmez); user_ids verilmezse tüm kullanıcılar.
+
+    Beğeni ve takipçi sayıları ayrı alt sorgularla hesaplanır, böylece iki
+    JOIN'in birbirini çoğaltması olmaz. Puanı sıfır olan kullanıcılar dönmez.
+    """
+    since = timezone.now() - POPULARITY_WINDOW
+    users = CustomUser.objects.filter(is_active=True, is_banned=False)
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    rows = users.annotate(
+        thread_likes=_thread_likes_subquery(since),
+        new_followers=_new_followers_subquery(since),
+    ).annotate(
+        popularity=F('thread_likes') + F('new_followers') * 2
+    ).filter(popularity__gt=0).values_list(
+        'pk', 'thread_likes', 'new_followers', 'popularity', 'university', 'city'
+    )
+    return [
+        PopularityScore(
+            user_id=pk, thread_likes=thread_likes, new_followers=new_followers,
+            popularity=popularity, university=university, city=city,
+        )
+        for pk, thread_likes, new_followers, popularity, university, city in rows
+    ]
+
+
+def refresh_popularity():
+    """
+    Tüm sıralama tablosunu yeniden kurar ve önbellekteki sıralamaları geçersiz
+    kılar (refresh_popular_users komutu). Geçersiz kılma yalnızca paylaşımlı bir
+    önbellek backend'inde diğer süreçlere ulaşır; LocMemCache ile web
+    süreçlerindeki sıralamalar POPULAR_USERS_CACHE_TIMEOUT sonunda yenilenir.
+    """
+    scores = compute_scores()
+    with transaction.atomic():
+        PopularityScore.objects.all().delete()
+        PopularityScore.objects.bulk_create(scores, batch_size=500)
+    transaction.on_commit(invalidate_popular_users)
+    return len(scores)
+
+
+def update_user_popularity(user_ids):
+    """
+    Verilen kullanıcıların satırlarını yerinde günceller (takip/beğeni olayları).
+    Önbellekteki sıralamalara dokunmaz; değişiklik önbellek süresi dolunca görünür.
+    """
+    scores = compute_scores(user_ids)
+    with transaction.atomic():
+        PopularityScore.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['thread_likes', 'new_followers', 'popularity', 'university', 'city', 'updated_at'],
+        )
+        PopularityScore.objects.filter(user_id__in=user_ids).exclude(
+            user_id__in=[score.user_id for score in scores]
+        ).delete()
+    return len(scores)
+
+
+def schedule_popularity_refresh(user_id):
+    """Kullanıcının puanını işlem commit edildikten sonra arka planda günceller"""
+    background.enqueue_on_commit(('user-popularity', user_id), update_user_popularity, [user_id])
+
+
+def invalidate_popular_users():
+    """Tüm önbellekteki sıralamaları nesil numarasını artırarak geçersiz kılar"""
+    try:
+        cache.incr(POPULAR_USERS_GENERATION_KEY)
+    except ValueError:
+        cache.set(POPULAR_USERS_GENERATION_KEY, 1, None)
+
+
+def popular_users_cache_key(limit, university=None, city=None):
+    generation = cache.get_or_set(POPULAR_USERS_GENERATION_KEY, 1, None)
+    digest = hashlib.md5(f'{university}|{city}'.encode()).hexdigest()
+    return f'users:popular:{generation}:{limit}:{digest}'
+
+
+def top_users(limit=POPULAR_USERS_LIMIT, university=None, city=None):
+    """
+    Sıralamanın ilk limit kullanıcısının (user_id, thread_likes, new_followers,
+    popularity) satırları; sonuç önbellekte tutulur.
+    """
+    key = popular_users_cache_key(limit, university, city)
+    rows = cache.get(key)
+    if rows is None:
+        scores = PopularityScore.objects.all()
+        if university:
+            scores = scores.filter(university=university)
+        if city:
+            scores = scores.filter(city=city)
+        rows = list(scores.order_by('-popularity', 'user_id').values_list(
+            'user_id', 'thread_likes', 'new_followers', 'popularity'
+        )[:limit])
+        cache.set(key, rows, POPULAR_USERS_CACHE_TIMEOUT)
+    return rows
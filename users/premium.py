@@ -0,0 +1,14 @@
+from django.utils import timezone
+from .models import CustomUser
+
+
+def expired_premium_users(now=None):
+    """is_premium bayrağı açık kalmış, süresi dolmuş hesaplar"""
+    return CustomUser.objects.filter(is_premium=True, premium_expires_at__lt=now or timezone.now())
+
+
+def expire_premium(now=None):
+    """Süresi dolan premium üyelikleri tek UPDATE ile kapatır"""
+    now = now or timezone.now()
+    # update() auto_now alanını güncellemez, eski save() davranışı korunur
+    return expired_premium_users(now).update(is_premium=False, updated_at=now)
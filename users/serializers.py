@@ -2,6 +2,15 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import CustomUser, Notification
+from .counters import Follow
+
+
+def is_following(context, user):
+    """İsteği yapan kullanıcının verilen kullanıcıyı takip edip etmediği, tek EXISTS sorgusuyla"""
+    request = context.get('request')
+    if request and request.user.is_authenticated:
+        return Follow.objects.filter(from_customuser=user, to_customuser=request.user).exists()
+    return False
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -101,10 +110,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
                            'is_banned', 'ban_reason', 'ban_until')
     
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return request.user in obj.followers.all()
-        return False
+        return is_following(self.context, obj)
 
 class UserUpdateSerializer(serializers.ModelSerializer):
     university = serializers.CharField(required=False, allow_blank=True, allow_null=True)
@@ -153,6 +159,21 @@ class UserSerializer(serializers.ModelSerializer):
                  'created_at', 'updated_at', 'is_banned', 'ban_reason', 'ban_until', 'university', 'city']
         read_only_fields = ['id', 'created_at', 'updated_at', 'is_banned', 'ban_reason', 'ban_until']
 
+class PublicProfileListSerializer(serializers.ListSerializer):
+    """Listelenen kullanıcılardan hangilerinin takip edildiğini tek sorguda çeker"""
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        user = request.user if request else None
+        if user and user.is_authenticated:
+            self.context['following_ids'] = set(
+                Follow.objects.filter(
+                    to_customuser_id=user.id, from_customuser_id__in=[profile.id for profile in users]
+                ).values_list('from_customuser_id', flat=True)
+            )
+        return super().to_representation(users)
+
 class PublicProfileSerializer(serializers.ModelSerializer):
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
@@ -176,6 +197,7 @@ class PublicProfileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = CustomUser
+        list_serializer_class = PublicProfileListSerializer
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile_picture', 'bio',
                  'phone_number', 'custom_username_color', 'card_number', 'card_issued_at',
                  'instagram', 'twitter', 'facebook', 'linkedin', 'website',
@@ -189,10 +211,27 @@ class PublicProfileSerializer(serializers.ModelSerializer):
                            'is_banned', 'ban_reason', 'ban_until', 'popularity', 'thread_likes', 'new_followers']
     
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return request.user in obj.followers.all()
-        return False
+        following_ids = self.context.get('following_ids')
+        if following_ids is not None:
+            return obj.id in following_ids
+        return is_following(self.context, obj)
+
+class UserCardSerializer(serializers.ModelSerializer):
+    """Takipçi/takip listeleri için sorgu gerektirmeyen kompakt kullanıcı kartı"""
+    is_premium_active = serializers.ReadOnlyField()
+    is_following = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'profile_picture', 'custom_username_color', 'is_premium_active', 'is_following']
+        read_only_fields = fields
+
+    def get_is_following(self, obj):
+        # Liste view'ları değeri sayfa sorgusunda EXISTS ile açıklar
+        viewer_follows = getattr(obj, 'viewer_follows', None)
+        if viewer_follows is not None:
+            return viewer_follows
+        return is_following(self.context, obj)
 
 class FollowSerializer(serializers.Serializer):
     user_id = serializers.IntegerField()
@@ -0,0 +1,33 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+from .models import CustomUser
+from .counters import Follow, recount_follows
+from .popularity import schedule_popularity_refresh
+
+
+def _follows_changed(user_ids):
+    """Sayaçları hemen, popülerlik puanlarını arka planda yeniler"""
+    recount_follows(user_ids)
+    for user_id in user_ids:
+        schedule_popularity_refresh(user_id)
+
+
+@receiver(m2m_changed, sender=Follow)
+def follows_changed(sender, instance, action, pk_set, **kwargs):
+    """followers/following üzerinden yapılan değişikliklerde (ör. admin) sayaçları yeniden hesaplar"""
+    if action == 'pre_clear':
+        instance._cleared_follow_ids = list(
+            Follow.objects.filter(from_customuser=instance).values_list('to_customuser_id', flat=True)
+        ) + list(Follow.objects.filter(to_customuser=instance).values_list('from_customuser_id', flat=True))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        _follows_changed([instance.pk, *pk_set])
+    elif action == 'post_clear':
+        _follows_changed([instance.pk, *getattr(instance, '_cleared_follow_ids', [])])
+
+
+@receiver(pre_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    # Kullanıcı silinince ara tablo satırları sinyalsiz silinir
+    CustomUser.objects.filter(followers=instance).update(followers_count=F('followers_count') - 1)
+    CustomUser.objects.filter(following=instance).update(following_count=F('following_count') - 1)
@@ -1,3 +1,190 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from forum.models import Thread
+from .counters import recount_follows
+from .models import CustomUser, Follow, PopularityScore
+from .serializers import PublicProfileSerializer
 
-# Create your tests here.
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class PopularUsersTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            CustomUser.objects.create(
+                username=f'user{i}', email=f'user{i}@example.com', university='A' if i % 2 else 'B', city='X'
+            )
+            for i in range(6)
+        ]
+        self.thread = Thread.objects.create(title='Konu', creator=self.users[0])
+        self.thread.likes.add(*self.users[1:4])
+        for follower in self.users[1:4]:
+            self.users[0].followers.add(follower)
+        self.users[1].followers.add(self.users[2])
+        call_command('refresh_popular_users', stdout=StringIO())
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[4])
+
+    def ranking(self, query=''):
+        return [(user['username'], user['popularity']) for user in self.client.get(f'/api/users/popular-users/{query}').json()]
+
+    def test_counts_are_not_multiplied(self):
+        score = PopularityScore.objects.get(user=self.users[0])
+        self.assertEqual((score.thread_likes, score.new_followers, score.popularity), (3, 3, 9))
+        self.assertEqual(self.ranking(), [('user0', 9), ('user1', 2)])
+        self.assertEqual(self.ranking('?university=A'), [('user1', 2)])
+        self.assertEqual(self.ranking('?limit=1'), [('user0', 9)])
+
+    def test_events_update_rows_without_invalidating_cache(self):
+        self.assertEqual(self.ranking('?university=A'), [('user1', 2)])
+        client = APIClient()
+        client.force_authenticate(self.users[5])
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/users/follow/', {'user_id': self.users[1].id, 'action': 'follow'})
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/forum/threads/{self.thread.id}/like/')
+        self.assertEqual(PopularityScore.objects.get(user=self.users[1]).popularity, 4)
+        self.assertEqual(PopularityScore.objects.get(user=self.users[0]).thread_likes, 4)
+        # Önbellekteki sıralama zamanlanmış yenilemeye kadar korunur
+        self.assertEqual(self.ranking('?university=A'), [('user1', 2)])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('refresh_popular_users', stdout=StringIO())
+        self.assertEqual(self.ranking('?university=A'), [('user1', 4)])
+
+    def test_banned_users_dropped(self):
+        CustomUser.objects.filter(pk=self.users[0].pk).update(is_banned=True)
+        self.assertEqual(self.ranking(), [('user1', 2)])
+        call_command('refresh_popular_users', stdout=StringIO())
+        self.assertFalse(PopularityScore.objects.filter(user=self.users[0]).exists())
+
+
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = CustomUser.objects.bulk_create(
+            CustomUser(username=name, email=f'{name}@example.com', email_verified=True)
+            for name in ('alice', 'bob', 'carol')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def follow(self, client, user, action='follow'):
+        return client.post('/api/users/follow/', {'user_id': user.id, 'action': action})
+
+    def counts(self):
+        return {user.username: (user.followers_count, user.following_count) for user in CustomUser.objects.all()}
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        for _ in range(2):
+            self.assertEqual(self.follow(self.client, self.bob).status_code, 200)
+        self.follow(self.client, self.carol)
+        bob_client = APIClient()
+        bob_client.force_authenticate(self.bob)
+        self.follow(bob_client, self.carol)
+        self.assertEqual(self.counts(), {'alice': (0, 2), 'bob': (1, 1), 'carol': (2, 0)})
+
+        for _ in range(2):
+            self.follow(self.client, self.carol, 'unfollow')
+        self.assertEqual(self.counts(), {'alice': (0, 1), 'bob': (1, 1), 'carol': (1, 0)})
+
+    def test_relation_changes_and_user_deletion(self):
+        self.alice.following.add(self.bob)
+        self.carol.followers.add(self.alice, self.bob)
+        self.assertEqual(self.counts(), {'alice': (0, 2), 'bob': (1, 1), 'carol': (2, 0)})
+        self.bob.delete()
+        self.assertEqual(self.counts(), {'alice': (0, 1), 'carol': (1, 0)})
+
+        expected = self.counts()
+        CustomUser.objects.update(followers_count=9, following_count=9)
+        recount_follows()
+        self.assertEqual(self.counts(), expected)
+
+        self.alice.following.clear()
+        self.assertEqual(self.counts(), {'alice': (0, 0), 'carol': (0, 0)})
+
+
+class FollowListTests(TestCase):
+    def setUp(self):
+        self.users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'member{i}', email=f'member{i}@example.com') for i in range(40)
+        )
+        self.viewer, self.target = self.users[:2]
+        self.target.followers.add(*self.users[2:])
+        self.viewer.following.add(self.users[3], self.users[5])
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_public_profile_is_following(self):
+        self.assertTrue(self.client.get('/api/users/public/member3/').json()['is_following'])
+        self.assertFalse(self.client.get('/api/users/public/member4/').json()['is_following'])
+
+    def test_profile_list_resolves_follows_in_one_query(self):
+        request = RequestFactory().get('/')
+        request.user = self.viewer
+        profiles = self.users[2:8]
+        with CaptureQueriesContext(connection) as queries:
+            data = PublicProfileSerializer(profiles, many=True, context={'request': request}).data
+        follow_queries = [q for q in queries.captured_queries if 'users_customuser_followers' in q['sql']]
+        self.assertEqual(len(follow_queries), 1)
+        self.assertEqual({p['username'] for p in data if p['is_following']}, {'member3', 'member5'})
+
+    def test_follower_list_is_paginated_and_slim(self):
+        url = '/api/users/followers/member1/?page_size=15'
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertLessEqual(len(queries), 2)
+            seen += response.json()['results']
+            url = response.json()['next']
+        self.assertEqual([p['username'] for p in seen], [f'member{i}' for i in range(39, 1, -1)])
+        self.assertEqual({p['username'] for p in seen if p['is_following']}, {'member3', 'member5'})
+        self.assertEqual(
+            set(seen[0]),
+            {'id', 'username', 'profile_picture', 'custom_username_color', 'is_premium_active', 'is_following'},
+        )
+
+    def test_seek_uses_the_follow_index(self):
+        rows = Follow.objects.filter(from_customuser_id=self.target.id, id__lt=10**9).order_by('-id')[:15]
+        self.assertIn('users_follow_from_seek_idx', rows.explain())
+        rows = Follow.objects.filter(to_customuser_id=self.viewer.id, id__lt=10**9).order_by('-id')[:15]
+        self.assertIn('users_follow_to_seek_idx', rows.explain())
+
+    def test_following_list(self):
+        response = self.client.get('/api/users/following/member0/')
+        self.assertEqual([p['username'] for p in response.json()['results']], ['member5', 'member3'])
+        response = APIClient().get('/api/users/following/member0/')
+        self.assertFalse(any(p['is_following'] for p in response.json()['results']))
+        self.assertEqual(self.client.get('/api/users/following/nobody/').status_code, 404)
+
+
+class PremiumStatusTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.users = CustomUser.objects.bulk_create([
+            CustomUser(username='expired', email='expired@example.com', is_premium=True, premium_expires_at=now - timedelta(days=1)),
+            CustomUser(username='active', email='active@example.com', is_premium=True, premium_expires_at=now + timedelta(days=1)),
+            CustomUser(username='lifetime', email='lifetime@example.com', is_premium=True),
+        ])
+
+    def test_status_is_read_without_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual([user.is_premium_active for user in self.users], [False, True, True])
+            PublicProfileSerializer(self.users, many=True, context={}).data
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+
+    def test_expire_premium_command(self):
+        call_command('expire_premium', '--dry-run', stdout=StringIO())
+        self.assertEqual(CustomUser.objects.filter(is_premium=True).count(), 3)
+        call_command('expire_premium', stdout=StringIO())
+        premium = CustomUser.objects.filter(is_premium=True).order_by('username').values_list('username', flat=True)
+        self.assertEqual(list(premium), ['active', 'lifetime'])
@@ -1,3 +1,4 @@
+import logging
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
@@ -17,12 +18,18 @@ from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     UserUpdateSerializer, EmailVerificationSerializer, PasswordChangeSerializer,
     PasswordResetRequestSerializer, PasswordResetConfirmSerializer,
-    PublicProfileSerializer, FollowSerializer, UserSerializer, NotificationSerializer
+    PublicProfileSerializer, FollowSerializer, UserSerializer, NotificationSerializer, UserCardSerializer
 )
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .permissions import IsNotBanned
-from django.db.models import Count, Q
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Value
+from core.pagination import KeysetPagination
+from .counters import Follow
+from .popularity import POPULAR_USERS_LIMIT, POPULAR_USERS_MAX_LIMIT, schedule_popularity_refresh, top_users
+
+logger = logging.getLogger(__name__)
 
 class UserRegistrationView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -35,8 +42,7 @@ class UserRegistrationView(APIView):
             # 6 haneli doğrulama kodu oluştur
             verification_code = user.generate_verification_code()
             
-            # Kodu backend'de printle (şimdilik)
-            print(f"Kullanıcı {user.email} için doğrulama kodu: {verification_code}")
+            logger.info('Doğrulama kodu oluşturuldu', extra={'user_id': user.id, 'reason': 'registration'})
             
             return Response({
                 'message': 'Kayıt başarılı! Email adresinizi doğrulamanız gerekiyor.',
@@ -83,7 +89,7 @@ class UserLoginView(APIView):
             if not user.email_verified:
                 # Yeni kod oluştur
                 verification_code = user.generate_verification_code()
-                print(f"Giriş denemesi - Kullanıcı {user.email} için doğrulama kodu: {verification_code}")
+                logger.info('Doğrulama kodu oluşturuldu', extra={'user_id': user.id, 'reason': 'login'})
                 
                 return Response({
                     'message': 'Email adresinizi doğrulamanız gerekiyor.',
@@ -123,8 +129,8 @@ class UserLoginView(APIView):
                     'facebook': user.facebook,
                     'linkedin': user.linkedin,
                     'website': user.website,
-                    'followers_count': user.followers.count(),
-                    'following_count': user.following.count(),
+                    'followers_count': user.followers_count,
+                    'following_count': user.following_count,
                     'is_following': False,  # Kendisi kendisini takip etmez
                     'created_at': user.date_joined.isoformat(),
                     'updated_at': user.updated_at.isoformat() if hasattr(user, 'updated_at') else user.date_joined.isoformat(),
@@ -193,8 +199,7 @@ class ResendVerificationEmailView(APIView):
             # Yeni kod oluştur
             verification_code = user.generate_verification_code()
             
-            # Kodu backend'de printle (şimdilik)
-            print(f"Kullanıcı {user.email} için yeni doğrulama kodu: {verification_code}")
+            logger.info('Doğrulama kodu oluşturuldu', extra={'user_id': user.id, 'reason': 'resend'})
             
             return Response({
                 'message': 'Yeni doğrulama kodu oluşturuldu.',
@@ -261,7 +266,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
                 is_gif = file.content_type == 'image/gif'
             else:
                 is_gif = str(file).lower().endswith('.gif')
-            if is_gif and not user.is_premium:
+            if is_gif and not user.is_premium_active:
                 return Response({
                     'message': 'Sadece Premium üyeler GIF profil resmine sahip olabilir.',
                     'error': 'GIF_PROFILE_PICTURE_PREMIUM_ONLY'
@@ -300,7 +305,7 @@ class UserUpdateView(generics.UpdateAPIView):
                 is_gif = file.content_type == 'image/gif'
             else:
                 is_gif = str(file).lower().endswith('.gif')
-            if is_gif and not user.is_premium:
+            if is_gif and not user.is_premium_active:
                 return Response({
                     'message': 'Sadece Premium üyeler GIF profil resmine sahip olabilir.',
                     'error': 'GIF_PROFILE_PICTURE_PREMIUM_ONLY'
@@ -406,6 +411,29 @@ class PublicProfileView(APIView):
                 'message': 'Kullanıcı bulunamadı.'
             }, status=status.HTTP_404_NOT_FOUND)
 
+def follow_user(follower, target):
+    """Takip satırını ekler ve sayaçları aynı işlemde artırır; zaten takip ediliyorsa False"""
+    try:
+        with transaction.atomic():
+            Follow.objects.create(from_customuser=target, to_customuser=follower)
+            CustomUser.objects.filter(pk=target.pk).update(followers_count=F('followers_count') + 1)
+            CustomUser.objects.filter(pk=follower.pk).update(following_count=F('following_count') + 1)
+            schedule_popularity_refresh(target.pk)
+    except IntegrityError:
+        return False
+    return True
+
+def unfollow_user(follower, target):
+    """Takip satırını siler ve sayaçları aynı işlemde azaltır; takip edilmiyorsa False"""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(from_customuser=target, to_customuser=follower).delete()
+        if not deleted:
+            return False
+        CustomUser.objects.filter(pk=target.pk).update(followers_count=F('followers_count') - 1)
+        CustomUser.objects.filter(pk=follower.pk).update(following_count=F('following_count') - 1)
+        schedule_popularity_refresh(target.pk)
+    return True
+
 class FollowUserView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsNotBanned]
     
@@ -421,17 +449,16 @@ class FollowUserView(APIView):
                 if action == 'follow':
                     if request.user != target_user:
                         # Takip işlemi
-                        request.user.following.add(target_user)
+                        if follow_user(request.user, target_user):
+                            # Takip bildirimi oluştur
+                            Notification.create_follow_notification(request.user, target_user)
                         message = f'{target_user.username} kullanıcısını takip etmeye başladınız.'
-                        
-                        # Takip bildirimi oluştur
-                        Notification.create_follow_notification(request.user, target_user)
                     else:
                         return Response({
                             'message': 'Kendinizi takip edemezsiniz.'
                         }, status=status.HTTP_400_BAD_REQUEST)
                 elif action == 'unfollow':
-                    request.user.following.remove(target_user)
+                    unfollow_user(request.user, target_user)
                     message = f'{target_user.username} kullanıcısını takipten çıkardınız.'
                 
                 return Response({
@@ -446,34 +473,58 @@ class FollowUserView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserFollowersView(APIView):
-    permission_classes = [permissions.AllowAny]
-    
-    def get(self, request, username):
-        try:
-            user = CustomUser.objects.get(username=username)
-            followers = user.followers.all()
-            serializer = PublicProfileSerializer(followers, many=True, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except CustomUser.DoesNotExist:
-            return Response({
-                'message': 'Kullanıcı bulunamadı.'
-            }, status=status.HTTP_404_NOT_FOUND)
+class FollowPagination(KeysetPagination):
+    """Takip tablosu satırları üzerinde en yeni takipten eskiye seek sayfalama"""
+    ordering = ('-id',)
+    page_size = 30
 
-class UserFollowingView(APIView):
+class FollowListView(APIView):
+    """
+    Takipçi/takip listesi: her sayfa takip tablosunda tek sorgudur. Kullanıcı
+    kartı select_related ile, isteği yapanın takip durumu EXISTS ile aynı
+    sorguda gelir.
+    """
     permission_classes = [permissions.AllowAny]
-    
+    pagination_class = FollowPagination
+    # Listelenen kullanıcı tarafı ve sayfanın sahibini süzen alan
+    user_field = None
+    owner_field = None
+
     def get(self, request, username):
-        try:
-            user = CustomUser.objects.get(username=username)
-            following = user.following.all()
-            serializer = PublicProfileSerializer(following, many=True, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except CustomUser.DoesNotExist:
+        owner_id = CustomUser.objects.filter(username=username).values_list('id', flat=True).first()
+        if owner_id is None:
             return Response({
                 'message': 'Kullanıcı bulunamadı.'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        if request.user.is_authenticated:
+            viewer_follows = Exists(Follow.objects.filter(
+                from_customuser_id=OuterRef(f'{self.user_field}_id'), to_customuser_id=request.user.id
+            ))
+        else:
+            viewer_follows = Value(False)
+        queryset = Follow.objects.filter(**{f'{self.owner_field}_id': owner_id}).select_related(
+            self.user_field
+        ).annotate(viewer_follows=viewer_follows)
+
+        paginator = self.pagination_class()
+        users = []
+        for row in paginator.paginate_queryset(queryset, request, view=self):
+            user = getattr(row, self.user_field)
+            user.viewer_follows = row.viewer_follows
+            users.append(user)
+        serializer = UserCardSerializer(users, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+class UserFollowersView(FollowListView):
+    # from_customuser takip edilen, to_customuser takipçidir
+    user_field = 'to_customuser'
+    owner_field = 'from_customuser'
+
+class UserFollowingView(FollowListView):
+    user_field = 'from_customuser'
+    owner_field = 'to_customuser'
+
 class UpdateUsernameColorView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsNotBanned]
     
@@ -537,8 +588,7 @@ class RequestNameChangeView(APIView):
             # Doğrulama kodu oluştur
             verification_code = user.generate_verification_code()
             
-            # Kodu backend'de printle (şimdilik)
-            print(f"İsim değişikliği - Kullanıcı {user.email} için doğrulama kodu: {verification_code}")
+            logger.info('Doğrulama kodu oluşturuldu', extra={'user_id': user.id, 'reason': 'name_change'})
             
             # Geçici olarak kodu user model'inde sakla
             user.temp_verification_code = verification_code
@@ -547,11 +597,9 @@ class RequestNameChangeView(APIView):
             user.temp_verification_expires = timezone.now() + timedelta(minutes=5)
             user.save()
             
-            print(f"DEBUG - User model saved for user {user.email}")
-            print(f"DEBUG - Stored code: {user.temp_verification_code}")
-            print(f"DEBUG - Stored first_name: {user.temp_first_name}")
-            print(f"DEBUG - Stored last_name: {user.temp_last_name}")
-            print(f"DEBUG - Stored expires: {user.temp_verification_expires}")
+            logger.debug('İsim değişikliği isteği kaydedildi', extra={
+                'user_id': user.id, 'expires_at': user.temp_verification_expires,
+            })
             
             return Response({
                 'message': 'Doğrulama kodu e-posta adresinize gönderildi.',
@@ -583,12 +631,9 @@ class VerifyNameChangeView(APIView):
             stored_last_name = user.temp_last_name
             stored_expires = user.temp_verification_expires
             
-            print(f"DEBUG - Verification attempt for user {user.email}")
-            print(f"DEBUG - Received code: {verification_code}")
-            print(f"DEBUG - Stored code: {stored_code}")
-            print(f"DEBUG - Stored first_name: {stored_first_name}")
-            print(f"DEBUG - Stored last_name: {stored_last_name}")
-            print(f"DEBUG - Stored expires: {stored_expires}")
+            logger.debug('İsim değişikliği doğrulama denemesi', extra={
+                'user_id': user.id, 'expires_at': stored_expires,
+            })
             
             if not stored_code or not stored_expires:
                 return Response({
@@ -653,8 +698,9 @@ class DeleteAccountView(APIView):
                 'message': 'Şifre yanlış.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Kullanıcıyı sil
-        user.delete()
+        # Kullanıcıyı sil; takip sayaçları users.signals.user_deleted içinde düşülür
+        with transaction.atomic():
+            user.delete()
         
         return Response({
             'message': 'Hesabınız başarıyla silindi.'
@@ -780,27 +826,35 @@ class UniversityListView(APIView):
 
 @api_view(['GET'])
 def popular_users(request):
-    """Aylık en popüler 10 kullanıcıyı döndürür"""
+    """
+    Aylık en popüler kullanıcıları döndürür; isteğe bağlı university ve city filtreleri.
+    Sıralama refresh_popular_users komutu ve takip/beğeni olaylarıyla güncellenen
+    PopularityScore tablosundan önbellekli olarak okunur.
+    """
     try:
-        # Son 30 günün tarihini hesapla
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        # Popüler kullanıcıları hesapla
-        popular_users = CustomUser.objects.filter(
-            is_active=True,
-            is_banned=False
-        ).annotate(
-            # Thread beğeni sayısı
-            thread_likes=Count('threads__likes', filter=Q(threads__created_at__gte=thirty_days_ago)),
-            # Yeni takipçi sayısı
-            new_followers=Count('followers', filter=Q(followers__date_joined__gte=thirty_days_ago)),
-            # Toplam popülerlik puanı
-            popularity=Count('threads__likes', filter=Q(threads__created_at__gte=thirty_days_ago)) + 
-                     Count('followers', filter=Q(followers__date_joined__gte=thirty_days_ago)) * 2
-        ).filter(
-            popularity__gt=0
-        ).order_by('-popularity')[:10]
-        
+        try:
+            limit = min(int(request.query_params.get('limit', POPULAR_USERS_LIMIT)), POPULAR_USERS_MAX_LIMIT)
+        except ValueError:
+            limit = POPULAR_USERS_LIMIT
+        rows = top_users(
+            max(limit, 1),
+            university=request.query_params.get('university') or None,
+            city=request.query_params.get('city') or None,
+        )
+        users = CustomUser.objects.filter(
+            pk__in=[row[0] for row in rows], is_active=True, is_banned=False
+        ).in_bulk()
+
+        popular_users = []
+        for user_id, thread_likes, new_followers, popularity in rows:
+            user = users.get(user_id)
+            if user is None:
+                continue  # Son yenilemeden beri banlanmış veya silinmiş
+            user.thread_likes = thread_likes
+            user.new_followers = new_followers
+            user.popularity = popularity
+            popular_users.append(user)
+
         serializer = PublicProfileSerializer(popular_users, many=True, context={'request': request})
         return Response(serializer.data)
         